@@ -0,0 +1,29 @@
+# Production server: gunicorn pre-forks one uvloop/httptools worker per core.
+#   gunicorn -c gunicorn.conf.py src.main:app
+import os
+import shutil
+
+# prometheus_client chooses between in-process and file-backed metric values at
+# import time, so the multiprocess directory must be set before it is imported.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import multiprocess  # noqa: E402
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "src.workers.ProductionUvicornWorker"
+reuse_port = True
+# Each worker must build its own event loop, DB/Redis pools and background tasks.
+preload_app = False
+keepalive = 5
+graceful_timeout = 30
+
+def on_starting(server):
+    # Files left over from a previous run would be aggregated into /metrics.
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,40 @@
+"""covering short_code index for redirect lookups
+
+Revision ID: 2b3c4d5e6f7a
+Revises: 1a2b3c4d5e6f
+Create Date: 2024-02-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b3c4d5e6f7a'
+down_revision: Union[str, None] = '1a2b3c4d5e6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so redirects keep working while the index is created.
+    # The redirect lookup (short_code -> long_url, tenant_id, status, expires_at)
+    # becomes an index-only scan once autovacuum has set the visibility map.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_links_short_code_covering', 'links', ['short_code'], unique=True,
+            postgresql_include=['long_url', 'tenant_id', 'status', 'expires_at'],
+            postgresql_concurrently=True,
+        )
+        # Superseded by the covering index above.
+        op.drop_index('ix_links_short_code', table_name='links', postgresql_concurrently=True)
+        # Prefix of idx_links_tenant_short_code, which serves the same queries.
+        op.drop_index('ix_links_tenant_id', table_name='links', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_links_tenant_id', 'links', ['tenant_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_links_short_code', 'links', ['short_code'], unique=True, postgresql_concurrently=True)
+        op.drop_index('ix_links_short_code_covering', table_name='links', postgresql_concurrently=True)
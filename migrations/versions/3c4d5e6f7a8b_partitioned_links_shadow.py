@@ -0,0 +1,95 @@
+"""hash-partitioned links shadow table with dual-write trigger
+
+Step 1 of moving links to hash partitions on short_code:
+  1. this migration: create links_partitioned and mirror every write to links into it
+  2. scripts/backfill_partitions.py: copy existing rows in batches
+  3. 4d5e6f7a8b9c: swap the tables once the backfill has finished
+
+Revision ID: 3c4d5e6f7a8b
+Revises: 2b3c4d5e6f7a
+Create Date: 2024-03-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c4d5e6f7a8b'
+down_revision: Union[str, None] = '2b3c4d5e6f7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+
+
+def upgrade() -> None:
+    op.create_table('links_partitioned',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('tenant_id', sa.String(), nullable=False),
+    sa.Column('short_code', sa.String(), nullable=False),
+    sa.Column('long_url', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('click_count', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    # Unique constraints on a partitioned table must include the partition key.
+    sa.PrimaryKeyConstraint('id', 'short_code', name='links_partitioned_pkey'),
+    postgresql_partition_by='HASH (short_code)',
+    )
+    for i in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE links_p{i:02d} PARTITION OF links_partitioned "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {i})"
+        )
+
+    # Created with temporary names; 4d5e6f7a8b9c renames them when the tables swap.
+    op.create_index(
+        'ix_links_partitioned_short_code_covering', 'links_partitioned', ['short_code'], unique=True,
+        postgresql_include=['long_url', 'tenant_id', 'status', 'expires_at'],
+    )
+    op.create_index('idx_links_partitioned_tenant_short_code', 'links_partitioned', ['tenant_id', 'short_code'])
+    # Only active links with an expiry are candidates for the cleanup job.
+    op.create_index(
+        'ix_links_partitioned_active_expires_at', 'links_partitioned', ['expires_at'],
+        postgresql_where=sa.text("status = 'active' AND expires_at IS NOT NULL"),
+    )
+
+    op.execute("""
+        CREATE FUNCTION links_dual_write() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM links_partitioned WHERE short_code = OLD.short_code;
+                RETURN OLD;
+            END IF;
+            INSERT INTO links_partitioned
+                (id, tenant_id, short_code, long_url, status, created_at, expires_at, click_count, updated_at)
+            VALUES
+                (NEW.id, NEW.tenant_id, NEW.short_code, NEW.long_url, NEW.status, NEW.created_at,
+                 NEW.expires_at, NEW.click_count, NEW.updated_at)
+            ON CONFLICT (short_code) DO UPDATE SET
+                tenant_id = EXCLUDED.tenant_id,
+                long_url = EXCLUDED.long_url,
+                status = EXCLUDED.status,
+                expires_at = EXCLUDED.expires_at,
+                click_count = EXCLUDED.click_count,
+                updated_at = EXCLUDED.updated_at;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER links_dual_write
+        AFTER INSERT OR UPDATE OR DELETE ON links
+        FOR EACH ROW EXECUTE FUNCTION links_dual_write()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS links_dual_write ON links")
+    op.execute("DROP FUNCTION IF EXISTS links_dual_write()")
+    op.drop_table('links_partitioned')
@@ -0,0 +1,109 @@
+"""swap links for the hash-partitioned table
+
+Run after scripts/backfill_partitions.py has finished. The old table is kept as
+links_unpartitioned until it is dropped by hand.
+
+Revision ID: 4d5e6f7a8b9c
+Revises: 3c4d5e6f7a8b
+Create Date: 2024-03-01 00:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d5e6f7a8b9c'
+down_revision: Union[str, None] = '3c4d5e6f7a8b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, tenant_id, short_code, long_url, status, created_at, expires_at, click_count, updated_at"
+
+DUAL_WRITE_FUNCTION = f"""
+    CREATE FUNCTION links_dual_write() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM links_partitioned WHERE short_code = OLD.short_code;
+            RETURN OLD;
+        END IF;
+        INSERT INTO links_partitioned ({COLUMNS})
+        VALUES
+            (NEW.id, NEW.tenant_id, NEW.short_code, NEW.long_url, NEW.status, NEW.created_at,
+             NEW.expires_at, NEW.click_count, NEW.updated_at)
+        ON CONFLICT (short_code) DO UPDATE SET
+            tenant_id = EXCLUDED.tenant_id,
+            long_url = EXCLUDED.long_url,
+            status = EXCLUDED.status,
+            expires_at = EXCLUDED.expires_at,
+            click_count = EXCLUDED.click_count,
+            updated_at = EXCLUDED.updated_at;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    if not context.is_offline_mode():
+        missing = op.get_bind().execute(sa.text(
+            "SELECT EXISTS (SELECT 1 FROM links l WHERE NOT EXISTS "
+            "(SELECT 1 FROM links_partitioned p WHERE p.short_code = l.short_code))"
+        )).scalar()
+        if missing:
+            raise RuntimeError("links_partitioned is missing rows; run scripts/backfill_partitions.py first")
+
+    op.execute("LOCK TABLE links IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER links_dual_write ON links")
+    op.execute("DROP FUNCTION links_dual_write()")
+
+    op.rename_table('links', 'links_unpartitioned')
+    op.execute("ALTER TABLE links_unpartitioned RENAME CONSTRAINT links_pkey TO links_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_links_short_code_covering RENAME TO ix_links_unpartitioned_short_code_covering")
+    op.execute("ALTER INDEX idx_links_tenant_short_code RENAME TO idx_links_unpartitioned_tenant_short_code")
+
+    op.rename_table('links_partitioned', 'links')
+    op.execute("ALTER TABLE links RENAME CONSTRAINT links_partitioned_pkey TO links_pkey")
+    op.execute("ALTER INDEX ix_links_partitioned_short_code_covering RENAME TO ix_links_short_code_covering")
+    op.execute("ALTER INDEX idx_links_partitioned_tenant_short_code RENAME TO idx_links_tenant_short_code")
+    op.execute("ALTER INDEX ix_links_partitioned_active_expires_at RENAME TO ix_links_active_expires_at")
+
+
+def downgrade() -> None:
+    op.execute("LOCK TABLE links IN ACCESS EXCLUSIVE MODE")
+
+    op.execute("ALTER INDEX ix_links_active_expires_at RENAME TO ix_links_partitioned_active_expires_at")
+    op.execute("ALTER INDEX idx_links_tenant_short_code RENAME TO idx_links_partitioned_tenant_short_code")
+    op.execute("ALTER INDEX ix_links_short_code_covering RENAME TO ix_links_partitioned_short_code_covering")
+    op.execute("ALTER TABLE links RENAME CONSTRAINT links_pkey TO links_partitioned_pkey")
+    op.rename_table('links', 'links_partitioned')
+
+    op.execute("ALTER INDEX idx_links_unpartitioned_tenant_short_code RENAME TO idx_links_tenant_short_code")
+    op.execute("ALTER INDEX ix_links_unpartitioned_short_code_covering RENAME TO ix_links_short_code_covering")
+    op.execute("ALTER TABLE links_unpartitioned RENAME CONSTRAINT links_unpartitioned_pkey TO links_pkey")
+    op.rename_table('links_unpartitioned', 'links')
+
+    # Writes since the swap only reached the partitioned table; bring them back.
+    op.execute(
+        "DELETE FROM links l WHERE NOT EXISTS "
+        "(SELECT 1 FROM links_partitioned p WHERE p.short_code = l.short_code)"
+    )
+    op.execute(f"""
+        INSERT INTO links ({COLUMNS}) SELECT {COLUMNS} FROM links_partitioned
+        ON CONFLICT (short_code) DO UPDATE SET
+            tenant_id = EXCLUDED.tenant_id,
+            long_url = EXCLUDED.long_url,
+            status = EXCLUDED.status,
+            expires_at = EXCLUDED.expires_at,
+            click_count = EXCLUDED.click_count,
+            updated_at = EXCLUDED.updated_at
+    """)
+
+    op.execute(DUAL_WRITE_FUNCTION)
+    op.execute("""
+        CREATE TRIGGER links_dual_write
+        AFTER INSERT OR UPDATE OR DELETE ON links
+        FOR EACH ROW EXECUTE FUNCTION links_dual_write()
+    """)
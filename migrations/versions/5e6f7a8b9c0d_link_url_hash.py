@@ -0,0 +1,51 @@
+"""url_hash column and per-tenant lookup index for link deduplication
+
+Revision ID: 5e6f7a8b9c0d
+Revises: 4d5e6f7a8b9c
+Create Date: 2024-04-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e6f7a8b9c0d'
+down_revision: Union[str, None] = '4d5e6f7a8b9c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _partitions() -> list[str]:
+    if context.is_offline_mode():
+        return [f"links_p{i:02d}" for i in range(16)]
+    return list(op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'links'::regclass ORDER BY c.relname"
+    )).scalars())
+
+
+def upgrade() -> None:
+    # Nullable, so adding it is a catalog-only change. Existing links keep a
+    # NULL hash and are simply never deduplicated against.
+    op.add_column('links', sa.Column('url_hash', sa.LargeBinary(length=32), nullable=True))
+    # Even though no row matches the predicate yet, building the index scans
+    # every partition. CONCURRENTLY is not available on a partitioned table, so
+    # the parent index is created empty (ON ONLY) and each partition's index is
+    # built concurrently and attached.
+    predicate = "status = 'active' AND url_hash IS NOT NULL"
+    op.execute(f"CREATE INDEX ix_links_tenant_url_hash ON ONLY links (tenant_id, url_hash) WHERE {predicate}")
+    with op.get_context().autocommit_block():
+        for partition in _partitions():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY {partition}_tenant_url_hash_idx "
+                f"ON {partition} (tenant_id, url_hash) WHERE {predicate}"
+            )
+            op.execute(f"ALTER INDEX ix_links_tenant_url_hash ATTACH PARTITION {partition}_tenant_url_hash_idx")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_links_tenant_url_hash', table_name='links')
+    op.drop_column('links', 'url_hash')
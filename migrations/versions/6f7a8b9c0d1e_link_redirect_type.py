@@ -0,0 +1,58 @@
+"""per-link redirect type, carried in the covering short_code index
+
+Revision ID: 6f7a8b9c0d1e
+Revises: 5e6f7a8b9c0d
+Create Date: 2024-05-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f7a8b9c0d1e'
+down_revision: Union[str, None] = '5e6f7a8b9c0d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _partitions() -> list[str]:
+    if context.is_offline_mode():
+        return [f"links_p{i:02d}" for i in range(16)]
+    return list(op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'links'::regclass ORDER BY c.relname"
+    )).scalars())
+
+
+def _rebuild_covering_index(include: list[str], version: str) -> None:
+    # CREATE INDEX CONCURRENTLY is not available on a partitioned table, so the
+    # parent index is created empty (ON ONLY) and each partition's index is
+    # built concurrently and attached. The new index is valid once every
+    # partition is attached; only then is the old one dropped.
+    columns = ", ".join(include)
+    partitions = _partitions()
+    op.execute(f"CREATE UNIQUE INDEX ix_links_short_code_rebuild ON ONLY links (short_code) INCLUDE ({columns})")
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(
+                f"CREATE UNIQUE INDEX CONCURRENTLY {partition}_short_code_{version}_idx "
+                f"ON {partition} (short_code) INCLUDE ({columns})"
+            )
+            op.execute(f"ALTER INDEX ix_links_short_code_rebuild ATTACH PARTITION {partition}_short_code_{version}_idx")
+    op.drop_index('ix_links_short_code_covering', table_name='links')
+    op.execute("ALTER INDEX ix_links_short_code_rebuild RENAME TO ix_links_short_code_covering")
+
+
+def upgrade() -> None:
+    # Constant default: no table rewrite. Allowed values (301/302/307/308) are
+    # enforced by the API schema.
+    op.add_column('links', sa.Column('redirect_type', sa.SmallInteger(), server_default='307', nullable=False))
+    _rebuild_covering_index(['long_url', 'tenant_id', 'status', 'expires_at', 'redirect_type'], 'resolve_v2')
+
+
+def downgrade() -> None:
+    _rebuild_covering_index(['long_url', 'tenant_id', 'status', 'expires_at'], 'resolve_v1')
+    op.drop_column('links', 'redirect_type')
@@ -0,0 +1,32 @@
+"""alias -> shard directory for custom aliases on non-default shards
+
+Revision ID: 8b9c0d1e2f3a
+Revises: 7a8b9c0d1e2f
+Create Date: 2024-06-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b9c0d1e2f3a'
+down_revision: Union[str, None] = '7a8b9c0d1e2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Only read and written on the default shard; empty elsewhere.
+    op.create_table('alias_shards',
+    sa.Column('short_code', sa.String(), nullable=False),
+    sa.Column('shard', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('short_code'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('alias_shards')
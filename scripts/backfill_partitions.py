@@ -0,0 +1,75 @@
+"""Copy existing links into the hash-partitioned shadow table.
+
+Run after migration 3c4d5e6f7a8b, which mirrors every new write to links into
+links_partitioned. Rows are copied in short_code order, one batch per
+transaction, so the tool can be stopped and resumed with --start-after.
+Rows already written by the trigger are left alone (ON CONFLICT DO NOTHING),
+so a concurrent update is never overwritten by an older copy.
+
+    python scripts/backfill_partitions.py --batch-size 5000 --pause 0.05
+    alembic upgrade head   # swaps the tables once the copy is complete
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import text  # noqa: E402
+
+from src.database import engine  # noqa: E402
+
+COLUMNS = "id, tenant_id, short_code, long_url, status, created_at, expires_at, click_count, updated_at"
+
+COPY_BATCH = text(f"""
+    WITH batch AS (
+        SELECT {COLUMNS} FROM links
+        WHERE short_code > :after
+        ORDER BY short_code
+        LIMIT :batch_size
+    ), copied AS (
+        INSERT INTO links_partitioned ({COLUMNS})
+        SELECT {COLUMNS} FROM batch
+        ON CONFLICT (short_code) DO NOTHING
+        RETURNING 1
+    )
+    SELECT (SELECT max(short_code) FROM batch), (SELECT count(*) FROM batch), (SELECT count(*) FROM copied)
+""")
+
+async def backfill(batch_size: int, pause: float, start_after: str):
+    engine.echo = False
+    after = start_after
+    scanned = copied = 0
+    started = time.perf_counter()
+
+    while True:
+        async with engine.begin() as conn:
+            last_code, batch_rows, batch_copied = (await conn.execute(
+                COPY_BATCH, {"after": after, "batch_size": batch_size}
+            )).one()
+        if not batch_rows:
+            break
+
+        after = last_code
+        scanned += batch_rows
+        copied += batch_copied
+        elapsed = time.perf_counter() - started
+        print(f"scanned {scanned:,} copied {copied:,} ({scanned / elapsed:,.0f} rows/s) last short_code={after!r}")
+        if pause:
+            await asyncio.sleep(pause)
+
+    print(f"✅  Backfill complete: scanned {scanned:,}, copied {copied:,}")
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--start-after", default="", help="resume after this short_code")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.pause, args.start_after))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Measure create latency and first-click latency against a running server.
+
+Each create uses its own tenant so the 5/min create limit never kicks in. The
+first redirect of every new code is timed separately; with write-through
+caching it should cost the same as any other cache hit.
+
+    python scripts/bench_create.py --creates 2000 --concurrency 16
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+BASE_URL = "http://localhost:8000"
+
+async def create_and_click(client: httpx.AsyncClient, run_id: str, i: int) -> tuple[float, float]:
+    headers = {"X-Tenant-Id": f"bench-create-{run_id}-{i}"}
+    payload = {"long_url": f"https://example.com/bench/{run_id}/{i}"}
+
+    start = time.perf_counter()
+    resp = await client.post("/v1/links", json=payload, headers=headers)
+    create_latency = time.perf_counter() - start
+    resp.raise_for_status()
+
+    start = time.perf_counter()
+    resp = await client.get(f"/{resp.json()['short_code']}", follow_redirects=False)
+    click_latency = time.perf_counter() - start
+    assert 300 <= resp.status_code < 400, resp.status_code
+    return create_latency, click_latency
+
+def report(name: str, timings: list[float]):
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{name:<14} p50 {timings[len(timings) // 2] * 1e3:7.2f}ms   p99 {p99 * 1e3:7.2f}ms   mean {statistics.mean(timings) * 1e3:7.2f}ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--creates", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(client, i):
+        async with semaphore:
+            return await create_and_click(client, run_id, i)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0) as client:
+        results = await asyncio.gather(*(bounded(client, i) for i in range(args.creates)))
+
+    report("create", [r[0] for r in results])
+    report("first click", [r[1] for r in results])
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""Measure how long a log call holds the event loop.
+
+Compares the old setup (StreamHandler + stdlib json on the calling thread) with
+the queue/listener pipeline from src.logging_config, logging from a coroutine
+the way request handlers do. Output goes to a pipe whose reader drains it
+slowly, to simulate stdout back-pressure under load.
+
+    python scripts/bench_logging.py --records 50000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.logging_config import (  # noqa: E402
+    JSONFormatter,
+    LogListener,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    request_id_var,
+)
+
+class StdlibJSONFormatter(logging.Formatter):
+    # The formatter as it was before the pipeline: stdlib json, inline.
+    def format(self, record):
+        return json.dumps({
+            "timestamp": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.module,
+            "funcName": record.funcName,
+        })
+
+def slow_pipe():
+    read_fd, write_fd = os.pipe()
+
+    def drain():
+        with os.fdopen(read_fd, "rb") as reader:
+            while reader.read(4096):
+                time.sleep(0.0005)
+
+    threading.Thread(target=drain, daemon=True).start()
+    return os.fdopen(write_fd, "w", buffering=1)
+
+async def measure(logger: logging.Logger, records: int) -> list[float]:
+    request_id_var.set("bench-request")
+    timings = []
+    for i in range(records):
+        start = time.perf_counter()
+        logger.info('%s - "%s %s HTTP/%s" %d', "127.0.0.1:5000", "GET", f"/code{i}", "1.1", 307)
+        timings.append(time.perf_counter() - start)
+        if i % 100 == 0:
+            await asyncio.sleep(0)
+    return timings
+
+def report(name: str, timings: list[float]):
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{name:<28} mean {statistics.mean(timings) * 1e6:8.2f}us   p99 {p99 * 1e6:8.2f}us   max {timings[-1] * 1e3:8.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=50000)
+    args = parser.parse_args()
+
+    # Before: synchronous handler on the calling thread.
+    logger = logging.getLogger("bench.sync")
+    logger.propagate = False
+    handler = logging.StreamHandler(slow_pipe())
+    handler.setFormatter(StdlibJSONFormatter())
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    report("StreamHandler + json", asyncio.run(measure(logger, args.records)))
+
+    # After: queue handler, formatting and writes on the listener thread.
+    for name, rates in (("QueueHandler + orjson", {}), ("QueueHandler + 1% sampling", {"bench.queue": 0.01})):
+        logger = logging.getLogger("bench.queue")
+        logger.propagate = False
+        stream_handler = logging.StreamHandler(slow_pipe())
+        stream_handler.setFormatter(JSONFormatter())
+        log_queue = queue.Queue(maxsize=10000)
+        queue_handler = NonBlockingQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(rates))
+        listener = LogListener(log_queue, stream_handler)
+        listener.start()
+        logger.handlers = [queue_handler]
+        logger.setLevel(logging.INFO)
+        report(name, asyncio.run(measure(logger, args.records)))
+        listener.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Compare lookup and write latency on a plain vs hash-partitioned links table.
+
+Generates --rows links server-side into two scratch tables with the same
+indexes as links (bench_links_plain, bench_links_hash with --partitions hash
+partitions on short_code), then times redirect lookups and single-row inserts
+against each. The default of 100M rows needs ~40GB of disk per table; use
+--rows for a quicker run.
+
+    python scripts/bench_partitioning.py --rows 100000000 --lookups 20000 --writes 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import text  # noqa: E402
+
+from src.database import engine  # noqa: E402
+
+TABLES = ("bench_links_plain", "bench_links_hash")
+CHUNK = 1_000_000
+
+def create_table_sql(table: str, partitions: int) -> list[str]:
+    partitioned = table == "bench_links_hash"
+    statements = [f"""
+        CREATE TABLE {table} (
+            id UUID NOT NULL,
+            tenant_id VARCHAR NOT NULL,
+            short_code VARCHAR NOT NULL,
+            long_url VARCHAR NOT NULL,
+            status VARCHAR NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            expires_at TIMESTAMPTZ,
+            click_count BIGINT NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY ({"id, short_code" if partitioned else "id"})
+        ) {"PARTITION BY HASH (short_code)" if partitioned else ""}
+    """]
+    if partitioned:
+        statements += [
+            f"CREATE TABLE {table}_p{i:02d} PARTITION OF {table} "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i})"
+            for i in range(partitions)
+        ]
+    return statements
+
+def index_sql(table: str) -> list[str]:
+    return [
+        f"CREATE UNIQUE INDEX ON {table} (short_code) INCLUDE (long_url, tenant_id, status, expires_at)",
+        f"CREATE INDEX ON {table} (tenant_id, short_code)",
+        f"CREATE INDEX ON {table} (expires_at) WHERE status = 'active' AND expires_at IS NOT NULL",
+        f"ANALYZE {table}",
+    ]
+
+async def execute(statement: str, **params):
+    async with engine.begin() as conn:
+        return await conn.execute(text(statement), params)
+
+async def generate(rows: int, partitions: int):
+    for table in TABLES:
+        await execute(f"DROP TABLE IF EXISTS {table}")
+        for statement in create_table_sql(table, partitions):
+            await execute(statement)
+
+        started = time.perf_counter()
+        for lo in range(0, rows, CHUNK):
+            hi = min(lo + CHUNK, rows) - 1
+            await execute(f"""
+                INSERT INTO {table} (id, tenant_id, short_code, long_url, status, click_count, expires_at)
+                SELECT gen_random_uuid(), 'tenant-' || (i % 1000), 'c' || i, 'https://example.com/' || i,
+                       'active', 0, CASE WHEN i % 10 = 0 THEN now() + interval '30 days' END
+                FROM generate_series(:lo, :hi) AS i
+            """, lo=lo, hi=hi)
+            print(f"{table}: {hi + 1:,}/{rows:,} rows ({time.perf_counter() - started:,.0f}s)", end="\r")
+        # Indexes are built after the load, which is much faster than maintaining them row by row.
+        for statement in index_sql(table):
+            await execute(statement)
+        print(f"{table}: {rows:,} rows loaded and indexed in {time.perf_counter() - started:,.0f}s")
+
+async def time_lookups(table: str, rows: int, lookups: int) -> list[float]:
+    stmt = text(f"SELECT long_url, tenant_id, status, expires_at FROM {table} WHERE short_code = :code")
+    timings = []
+    async with engine.connect() as conn:
+        for _ in range(lookups):
+            code = f"c{random.randrange(rows)}"
+            start = time.perf_counter()
+            (await conn.execute(stmt, {"code": code})).one()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+async def time_writes(table: str, rows: int, writes: int) -> list[float]:
+    stmt = text(f"""
+        INSERT INTO {table} (id, tenant_id, short_code, long_url, status, click_count)
+        VALUES (gen_random_uuid(), 'bench', :code, 'https://example.com/new', 'active', 0)
+    """)
+    timings = []
+    async with engine.connect() as conn:
+        for i in range(writes):
+            start = time.perf_counter()
+            await conn.execute(stmt, {"code": f"c{rows + i}"})
+            await conn.commit()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+def report(name: str, timings: list[float]):
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{name:<32} mean {statistics.mean(timings) * 1e3:7.3f}ms   p50 {timings[len(timings) // 2] * 1e3:7.3f}ms   p99 {p99 * 1e3:7.3f}ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--writes", type=int, default=5000)
+    parser.add_argument("--skip-generate", action="store_true", help="reuse tables from a previous run")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch tables afterwards")
+    args = parser.parse_args()
+
+    engine.echo = False
+    if not args.skip_generate:
+        await generate(args.rows, args.partitions)
+
+    for table in TABLES:
+        await time_lookups(table, args.rows, 500)  # warm up
+        report(f"{table} lookup", await time_lookups(table, args.rows, args.lookups))
+        report(f"{table} insert", await time_writes(table, args.rows, args.writes))
+        await execute(f"DELETE FROM {table} WHERE tenant_id = 'bench'")
+
+    if not args.keep:
+        for table in TABLES:
+            await execute(f"DROP TABLE IF EXISTS {table}")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
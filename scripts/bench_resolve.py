@@ -0,0 +1,78 @@
+"""Compare the redirect lookup through the ORM with the lean resolver query.
+
+Seeds --links rows (tenant "bench-resolve"), then times random lookups through
+get_link_by_short_code (full Link entity) and resolve_link (four columns,
+cached statement, covering index). Run against a migrated database:
+
+    python scripts/bench_resolve.py --links 100000 --lookups 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import delete, insert  # noqa: E402
+
+from src.crud import get_link_by_short_code, resolve_link  # noqa: E402
+from src.database import AsyncSessionLocal, engine  # noqa: E402
+from src.models import Link  # noqa: E402
+
+TENANT = "bench-resolve"
+
+async def seed(count: int) -> list[str]:
+    codes = [f"bench-resolve-{i}" for i in range(count)]
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Link).where(Link.tenant_id == TENANT))
+        for start in range(0, count, 5000):
+            await db.execute(insert(Link), [
+                {"tenant_id": TENANT, "short_code": code, "long_url": f"https://example.com/{code}",
+                 "status": "active", "click_count": 0}
+                for code in codes[start:start + 5000]
+            ])
+        await db.commit()
+    return codes
+
+async def time_lookups(lookup, codes: list[str], lookups: int) -> list[float]:
+    timings = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(lookups):
+            code = random.choice(codes)
+            start = time.perf_counter()
+            assert await lookup(db, code) is not None
+            timings.append(time.perf_counter() - start)
+            # Don't let the ORM identity map answer repeated lookups.
+            db.expunge_all()
+    return timings
+
+def report(name: str, timings: list[float]):
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{name:<24} mean {statistics.mean(timings) * 1e3:7.3f}ms   p50 {timings[len(timings) // 2] * 1e3:7.3f}ms   p99 {p99 * 1e3:7.3f}ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine.echo = False
+    codes = await seed(args.links)
+    # Warm up connections and statement caches for both paths.
+    await time_lookups(get_link_by_short_code, codes, 200)
+    await time_lookups(resolve_link, codes, 200)
+
+    report("ORM select(Link)", await time_lookups(get_link_by_short_code, codes, args.lookups))
+    report("resolve_link", await time_lookups(resolve_link, codes, args.lookups))
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Link).where(Link.tenant_id == TENANT))
+        await db.commit()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
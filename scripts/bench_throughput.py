@@ -0,0 +1,66 @@
+"""Measure request throughput against a running server.
+
+Used to check that the gunicorn production mode scales with workers:
+
+    WEB_CONCURRENCY=1 gunicorn -c gunicorn.conf.py src.main:app
+    python scripts/bench_throughput.py --path /health
+    WEB_CONCURRENCY=4 gunicorn -c gunicorn.conf.py src.main:app
+    python scripts/bench_throughput.py --path /health
+
+The load is generated from several processes so the client is not the bottleneck.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+
+import httpx
+
+async def run_client(base_url: str, path: str, concurrency: int, duration: float) -> tuple[int, int]:
+    ok = 0
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal ok, errors
+        while time.perf_counter() < deadline:
+            try:
+                resp = await client.get(path, follow_redirects=False)
+                if resp.status_code < 500:
+                    ok += 1
+                else:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=10.0) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return ok, errors
+
+def client_process(args, queue):
+    queue.put(asyncio.run(run_client(args.base_url, args.path, args.concurrency, args.duration)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--concurrency", type=int, default=32, help="connections per process")
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+
+    queue = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client_process, args=(args, queue)) for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+    results = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    ok = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    print(f"{args.path}: {ok / args.duration:,.0f} req/s ({ok} ok, {errors} errors in {args.duration:.0f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import secrets
+import tracemalloc
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from typing import Literal, Optional
+
+from ..config import settings
+from ..services.hot_keys import hot_keys
+from ..services.memory_profiler import memory_profiler, object_counts
+from ..storage.instrumentation import statement_fingerprints
+
+def require_debug_access(x_debug_token: Optional[str] = Header(None, alias="X-Debug-Token")):
+    # Off unless DEBUG_TOKEN is set: some of these endpoints are expensive
+    # (tracemalloc, heap walks), so they are never open by default.
+    if not settings.DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_debug_token or not secrets.compare_digest(x_debug_token, settings.DEBUG_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+router = APIRouter(dependencies=[Depends(require_debug_access)])
+
+@router.get("/hot-keys")
+async def get_hot_keys():
+    # "merged" covers every worker of every replica over the last two windows;
+    # "local" is this worker since its last sync, with Space-Saving error bounds.
+    return {
+        "window_seconds": hot_keys.window,
+        "merged": [
+            {"short_code": code, "requests": int(count)}
+            for code, count in hot_keys.heavy_hitters()
+        ],
+        "local": [
+            {"short_code": code, "requests": count, "max_error": error}
+            for code, count, error in hot_keys.local.top(hot_keys.top_k)
+        ],
+    }
+
+@router.get("/statements")
+async def get_statements():
+    # Maps the statement label of db_query_duration_seconds to its normalized SQL.
+    return statement_fingerprints
+
+@router.get("/memory")
+async def get_memory(objects: int = Query(0, ge=0, le=200)):
+    # ?objects=N adds the N most common object types (walks the whole heap).
+    status = memory_profiler.status()
+    if objects:
+        status["objects"] = object_counts(objects)
+    return status
+
+@router.post("/memory/tracemalloc/start")
+async def start_tracemalloc(frames: int = Query(settings.TRACEMALLOC_FRAMES, ge=1, le=50)):
+    memory_profiler.start_tracing(frames)
+    return memory_profiler.status()["tracemalloc"]
+
+@router.post("/memory/tracemalloc/stop")
+async def stop_tracemalloc():
+    memory_profiler.stop_tracing()
+    return memory_profiler.status()["tracemalloc"]
+
+@router.post("/memory/snapshots")
+async def take_memory_snapshot(
+    group_by: Literal["lineno", "filename"] = "lineno",
+    limit: int = Query(20, ge=1, le=500),
+):
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=409, detail="tracemalloc is not running")
+    snapshot_id = memory_profiler.take_snapshot()
+    return {"id": snapshot_id, "top": memory_profiler.top(snapshot_id, group_by, limit)}
+
+@router.get("/memory/snapshots/{snapshot_id}")
+async def get_memory_snapshot(
+    snapshot_id: int,
+    group_by: Literal["lineno", "filename"] = "lineno",
+    limit: int = Query(20, ge=1, le=500),
+):
+    if snapshot_id not in memory_profiler.snapshots:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"id": snapshot_id, "top": memory_profiler.top(snapshot_id, group_by, limit)}
+
+@router.get("/memory/diff")
+async def get_memory_diff(
+    base: int,
+    snapshot: int,
+    group_by: Literal["lineno", "filename"] = "lineno",
+    limit: int = Query(20, ge=1, le=500),
+):
+    for snapshot_id in (base, snapshot):
+        if snapshot_id not in memory_profiler.snapshots:
+            raise HTTPException(status_code=404, detail=f"Snapshot {snapshot_id} not found")
+    return {"base": base, "snapshot": snapshot, "diff": memory_profiler.diff(base, snapshot, group_by, limit)}
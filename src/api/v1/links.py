@@ -1,17 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, Header, Request, status, BackgroundTasks
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import IntegrityError
-from typing import Optional
+import json
+from email.utils import format_datetime
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response, status, BackgroundTasks
+from typing import Literal, Optional
 from datetime import datetime, timedelta, timezone
 
-from ...database import get_db
-from ...schemas import LinkCreate, LinkResponse, LinkMetadata
+from ...database import DEFAULT_SHARD, ShardSessions, get_shard_sessions, shards
+from ...schemas import BulkActionResponse, LinkCreate, LinkResponse, LinkMetadata, LinkStats
 from ...models import Link
-from ...crud import create_link, get_link_by_short_code, soft_delete_link, get_link_by_id
-from ...utils import generate_random_code
+from ...crud import (
+    bulk_update_link_status,
+    create_link,
+    find_duplicate_link,
+    get_link_by_short_code,
+    get_link_or_archived,
+    get_archived_link,
+    claim_alias_shard,
+    soft_delete_link,
+    get_link_by_id,
+)
+from ...storage import cache_store
+from ...utils import hash_url, link_cache_ttl, link_cache_value
 from ...config import settings
+from ...observability import LINK_DEDUP_LOOKUPS_TOTAL, LINK_DEDUP_ROWS_SAVED_TOTAL
 
+from ...services.admission import admission
 from ...services.rate_limiter import RateLimiter
+from ...services.shard_routing import find_on_shards, is_sharded_code, new_short_code
+from ...services.visitors import unique_visitors
 
 router = APIRouter()
 
@@ -19,103 +34,227 @@ router = APIRouter()
 async def shorten_link(
     link_in: LinkCreate,
     x_tenant_id: Optional[str] = Header(None, alias="X-Tenant-Id"),
-    db: AsyncSession = Depends(get_db)
+    sessions: ShardSessions = Depends(get_shard_sessions)
 ):
     tenant_id = x_tenant_id or link_in.tenant_id
     if not tenant_id:
         raise HTTPException(status_code=400, detail="Tenant ID is required (header or body)")
+    if link_in.custom_alias and is_sharded_code(link_in.custom_alias):
+        # Codes in this format are routed by their first character.
+        raise HTTPException(status_code=400, detail="Alias is reserved for generated codes")
+    shard = shards.shard_for_tenant(tenant_id)
+    db = sessions.shard(shard)
 
-    # 1. Generate short_code
-    if link_in.custom_alias:
-        short_code = link_in.custom_alias
-        # Check collision for custom alias immediately
-        existing = await get_link_by_short_code(db, short_code)
-        if existing:
+    long_url = str(link_in.long_url)
+    url_hash = hash_url(long_url)
+
+    # 1. Calculate expiry
+    expires_at = None
+    if link_in.ttl_seconds:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=link_in.ttl_seconds)
+
+    # 2-3 hold a database slot; under overload this sheds with 503 instead of queueing on the pool
+    async with admission.slot("create", tenant_id, sessions):
+        # 2. Reuse an existing link for the same URL (opt-in per tenant)
+        if not link_in.custom_alias and _dedup_enabled(tenant_id):
+            existing = await find_duplicate_link(
+                db, tenant_id, url_hash, long_url, link_in.redirect_type, expires_at,
+                settings.DEDUP_TTL_TOLERANCE_SECONDS
+            )
+            if existing:
+                LINK_DEDUP_LOOKUPS_TOTAL.labels(result="hit").inc()
+                LINK_DEDUP_ROWS_SAVED_TOTAL.inc()
+                return _link_response(existing)
+            LINK_DEDUP_LOOKUPS_TOTAL.labels(result="miss").inc()
+
+        # 3. Insert; a random code is regenerated only on an actual conflict
+        values = {
+            "tenant_id": tenant_id,
+            "long_url": long_url,
+            "url_hash": url_hash,
+            "expires_at": expires_at,
+            "status": "active",
+            "redirect_type": link_in.redirect_type,
+        }
+        # Generated codes carry their shard; aliases must also be free on every other shard.
+        if link_in.custom_alias and await _alias_taken_elsewhere(sessions, link_in.custom_alias, shard):
             raise HTTPException(status_code=409, detail="Alias already in use")
-    else:
-        # Retry loop for random collision
-        for _ in range(5):
-            short_code = generate_random_code()
-            if not await get_link_by_short_code(db, short_code):
+        # Registered before the insert. If the insert then fails, the alias is
+        # taken on this shard anyway, so the entry is still correct.
+        if link_in.custom_alias and shard != DEFAULT_SHARD:
+            if not await claim_alias_shard(sessions.shard(DEFAULT_SHARD), link_in.custom_alias, shard):
+                raise HTTPException(status_code=409, detail="Alias already in use")
+        attempts = 1 if link_in.custom_alias else 5
+        for _ in range(attempts):
+            short_code = link_in.custom_alias or new_short_code(shard)
+            # Archived codes are never reissued. Generated codes carry their
+            # shard, so only this shard's archive can hold them; aliases were
+            # checked on every shard above.
+            created_link = await create_link(
+                db, {**values, "short_code": short_code}, unless_archived=not link_in.custom_alias
+            )
+            if created_link:
                 break
         else:
+            if link_in.custom_alias:
+                raise HTTPException(status_code=409, detail="Alias already in use")
             raise HTTPException(status_code=500, detail="Could not generate unique code")
 
-    # 2. Calculate expiry
-    expires_at = None
-    if link_in.ttl_seconds:
-        expires_at = datetime.now(timezone.utc) + timedelta(seconds=link_in.ttl_seconds)
+    # 4. Write through to the redirect cache so the first click is a hit
+    ttl = link_cache_ttl(expires_at)
+    if ttl > 0:
+        cache_val = link_cache_value(long_url, tenant_id, created_link.redirect_type, expires_at)
+        await cache_store.set(f"short:{short_code}", cache_val, ex=ttl)
 
-    # 3. Save to DB
-    new_link = Link(
-        tenant_id=tenant_id,
-        short_code=short_code,
-        long_url=str(link_in.long_url),
-        expires_at=expires_at,
-        status="active"
-    )
+    return _link_response(created_link)
 
-    try:
-        created_link = await create_link(db, new_link)
-    except IntegrityError:
-        await db.rollback()
-        raise HTTPException(status_code=409, detail="Alias already in use")
-    
-    # 4. Construct response
+async def _alias_taken_elsewhere(sessions: ShardSessions, alias: str, shard: str) -> bool:
+    # Checked before the insert, so two tenants on different shards racing for
+    # the same new alias can both get it; the unique index only covers one shard.
+    # Archived codes stay reserved on every shard, including this one.
+    for other in shards.names:
+        db = sessions.shard(other)
+        if other != shard and await get_link_by_short_code(db, alias):
+            return True
+        if await get_archived_link(db, alias):
+            return True
+    return False
+
+def _dedup_enabled(tenant_id: str) -> bool:
+    return "*" in settings.DEDUP_TENANTS or tenant_id in settings.DEDUP_TENANTS
+
+def _link_response(link: Link) -> LinkResponse:
     # For now, base URL is hardcoded or from env. Ideally invalid in prod without proper domain.
     base_url = "http://localhost:8000" 
-    short_url = f"{base_url}/{short_code}"
+    short_url = f"{base_url}/{link.short_code}"
 
     return LinkResponse(
-        short_code=created_link.short_code,
+        short_code=link.short_code,
         short_url=short_url,
-        long_url=created_link.long_url,
-        expires_at=created_link.expires_at,
-        created_at=created_link.created_at,
-        status=created_link.status
+        long_url=link.long_url,
+        expires_at=link.expires_at,
+        created_at=link.created_at,
+        status=link.status,
+        redirect_type=link.redirect_type
     )
 
+@router.post("/links/bulk/{action}", response_model=BulkActionResponse)
+async def bulk_link_action(
+    action: Literal["disable", "enable", "expire"],
+    x_tenant_id: Optional[str] = Header(None, alias="X-Tenant-Id"),
+    sessions: ShardSessions = Depends(get_shard_sessions)
+):
+    if not x_tenant_id:
+         raise HTTPException(status_code=400, detail="Tenant ID is required for bulk actions")
+    db = sessions.for_tenant(x_tenant_id)
+
+    # Batches are committed as they go, so a failure part-way leaves earlier
+    # batches applied; repeating the call picks up the remaining links.
+    updated = 0
+    after = ""
+    while True:
+        async with admission.slot("create", x_tenant_id, sessions):
+            codes = await bulk_update_link_status(db, x_tenant_id, action, after, settings.BULK_BATCH_SIZE)
+        if not codes:
+            break
+        updated += len(codes)
+        after = max(codes)
+        await cache_store.unlink_many(
+            [f"short:{code}" for code in codes] + [f"meta:{code}" for code in codes]
+        )
+
+    return BulkActionResponse(tenant_id=x_tenant_id, action=action, updated=updated)
+
 @router.get("/links/{short_code}", response_model=LinkMetadata)
 async def get_link_metadata(
     short_code: str,
-    db: AsyncSession = Depends(get_db)
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    sessions: ShardSessions = Depends(get_shard_sessions)
+):
+    # Serve repeat requests (and revalidations) from Redis without touching Postgres.
+    cached = await cache_store.get(f"meta:{short_code}")
+    if cached:
+        entry = json.loads(cached)
+    else:
+        async with admission.slot("metadata", sessions=sessions):
+            _, link = await find_on_shards(sessions, short_code, get_link_or_archived)
+        if not link:
+            raise HTTPException(status_code=404, detail="Link not found")
+
+        base_url = "http://localhost:8000"
+        short_url = f"{base_url}/{short_code}"
+
+        metadata = LinkMetadata(
+            short_code=link.short_code,
+            short_url=short_url,
+            long_url=link.long_url,
+            expires_at=link.expires_at,
+            created_at=link.created_at,
+            status=link.status,
+            redirect_type=link.redirect_type,
+            click_count=link.click_count,
+            tenant_id=link.tenant_id,
+            archived_at=getattr(link, "archived_at", None)
+        )
+        entry = {
+            # Weak: derived from updated_at rather than the response bytes.
+            "etag": f'W/"{int(link.updated_at.timestamp() * 1_000_000):x}"',
+            "last_modified": format_datetime(link.updated_at.astimezone(timezone.utc), usegmt=True),
+            "body": metadata.model_dump_json(),
+        }
+        await cache_store.set(f"meta:{short_code}", json.dumps(entry), ex=settings.METADATA_CACHE_TTL)
+
+    headers = {"ETag": entry["etag"], "Last-Modified": entry["last_modified"], "Cache-Control": "no-cache"}
+    if if_none_match and _etag_matches(if_none_match, entry["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+@router.get("/links/{short_code}/stats", response_model=LinkStats)
+async def get_link_stats(
+    short_code: str,
+    days: int = Query(7, ge=1),
+    sessions: ShardSessions = Depends(get_shard_sessions)
 ):
-    link = await get_link_by_short_code(db, short_code)
+    async with admission.slot("metadata", sessions=sessions):
+        _, link = await find_on_shards(sessions, short_code, get_link_or_archived)
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
-    
-    base_url = "http://localhost:8000"
-    short_url = f"{base_url}/{short_code}"
 
-    return LinkMetadata(
-        short_code=link.short_code,
-        short_url=short_url,
-        long_url=link.long_url,
-        expires_at=link.expires_at,
-        created_at=link.created_at,
-        status=link.status,
+    days = min(days, settings.VISITOR_RETENTION_DAYS)
+    total, window = await unique_visitors(short_code, days)
+    return LinkStats(
+        short_code=short_code,
         click_count=link.click_count,
-        tenant_id=link.tenant_id
+        unique_visitors=total,
+        unique_visitors_window=window,
+        window_days=days,
     )
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/ prefixes are ignored.
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
 @router.delete("/links/{short_code}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_link(
     short_code: str,
     x_tenant_id: Optional[str] = Header(None, alias="X-Tenant-Id"),
-    db: AsyncSession = Depends(get_db)
+    sessions: ShardSessions = Depends(get_shard_sessions)
 ):
-    from ...redis import redis_client
-
     if not x_tenant_id:
          raise HTTPException(status_code=400, detail="Tenant ID is required for deletion")
 
-    success = await soft_delete_link(db, short_code, x_tenant_id)
+    async with admission.slot("create", x_tenant_id, sessions):
+        success = await soft_delete_link(sessions.for_tenant(x_tenant_id), short_code, x_tenant_id)
     if not success:
         # Could be 404 or just not owned by tenant. 
         # For security, we might want to be vague, but 404 is standard.
         raise HTTPException(status_code=404, detail="Link not found or not authorized")
     
     # Invalidate Cache
-    await redis_client.delete(f"short:{short_code}")
+    await cache_store.delete(f"short:{short_code}")
+    await cache_store.delete(f"meta:{short_code}")
 
     return None
@@ -1,9 +1,111 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
-    REDIS_URL: str
+    REDIS_URL: str = "redis://localhost:6379/0"
+    # "redis", or "memory" for an in-process cache/counter store (single node)
+    CACHE_BACKEND: str = "redis"
+    MEMORY_STORE_MAX_KEYS: int = 100000
+    MEMORY_STORE_MAX_BYTES: int = 256 * 1024 * 1024
+    # DATABASE_URL may also be sqlite+aiosqlite:///path.db (or :memory:)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    # Statements slower than this are counted per fingerprint; this fraction of
+    # them is also logged (without parameters)
+    DB_SLOW_QUERY_THRESHOLD: float = 0.1
+    DB_SLOW_QUERY_LOG_SAMPLE_RATE: float = 0.1
     ENVIRONMENT: str = "development"
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+
+    # Admission control: DB work gets one slot per pooled connection, except
+    # ADMISSION_RESERVED_CONNECTIONS left for the idempotency middleware and the
+    # click/cleanup/archival jobs. Each route class may use its share of the
+    # slots; requests queue at most
+    # ADMISSION_MAX_QUEUE_WAIT seconds (ADMISSION_MAX_QUEUE deep per class)
+    # before a 503. Tenants not listed in ADMISSION_TENANT_WEIGHTS weigh 1.
+    ADMISSION_CLASS_SHARES: dict[str, float] = {"redirect": 1.0, "create": 0.5, "metadata": 0.5}
+    ADMISSION_MAX_QUEUE_WAIT: float = 0.5
+    ADMISSION_MAX_QUEUE: int = 200
+    ADMISSION_TENANT_WEIGHTS: dict[str, float] = {}
+    ADMISSION_RETRY_AFTER: int = 1
+    ADMISSION_RESERVED_CONNECTIONS: int = 3
+
+    # HTTP caching: redirects may be cached by clients/CDNs for up to
+    # REDIRECT_CACHE_MAX_AGE seconds (capped at the link's expiry); metadata
+    # responses and their ETags are cached in Redis for METADATA_CACHE_TTL.
+    REDIRECT_CACHE_MAX_AGE: int = 300
+    METADATA_CACHE_TTL: int = 30
+
+    # Extra Postgres shards: single-character shard id -> database URL. Tenants
+    # are placed by SHARD_MAP (tenant_id -> shard id); everyone else, and every
+    # link created before sharding, lives on the "default" shard (DATABASE_URL).
+    SHARD_URLS: dict[str, str] = {}
+    SHARD_MAP: dict[str, str] = {}
+
+    # Links updated per transaction by tenant-wide bulk actions
+    BULK_BATCH_SIZE: int = 5000
+
+    # Archival: links disabled/expired/deleted and untouched for
+    # ARCHIVE_RETENTION_DAYS move to links_archive, ARCHIVE_BATCH_SIZE per
+    # transaction, every ARCHIVE_INTERVAL seconds. Redirects to archived codes
+    # are answered with 410 from a cached tombstone for ARCHIVE_TOMBSTONE_TTL.
+    ARCHIVE_RETENTION_DAYS: int = 30
+    ARCHIVE_BATCH_SIZE: int = 1000
+    ARCHIVE_INTERVAL: int = 3600
+    ARCHIVE_TOMBSTONE_TTL: int = 86400
+
+    # Tenants whose creates reuse an existing active link for the same URL and a
+    # compatible TTL ("*" for all tenants). Expiring links are reused when they
+    # expire no earlier than requested and at most DEDUP_TTL_TOLERANCE_SECONDS later.
+    DEDUP_TENANTS: list[str] = []
+    DEDUP_TTL_TOLERANCE_SECONDS: int = 300
+
+    # Redirect rate limits are spent from leases of this fraction of the limit
+    # (see LeasedRateLimiter). 0 checks Redis on every redirect.
+    RATE_LIMIT_LEASE_PRECISION: float = 0.1
+
+    # Logging: records are dropped once LOG_QUEUE_SIZE are waiting to be written.
+    # LOG_SAMPLE_RATES keeps a fraction of INFO records per logger name.
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_RATES: dict[str, float] = {"uvicorn.access": 0.01}
+
+    # Event loop monitor
+    LOOP_MONITOR_INTERVAL: float = 0.25
+    SLOW_CALLBACK_THRESHOLD: float = 0.1
+
+    # Memory profiling: gauge refresh interval in seconds, tracemalloc
+    # snapshots kept per worker for /debug/memory diffs, and stack depth
+    # recorded per allocation when tracing is started without ?frames=
+    MEMORY_METRICS_INTERVAL: float = 15.0
+    MEMORY_MAX_SNAPSHOTS: int = 5
+    TRACEMALLOC_FRAMES: int = 1
+
+    # Hot-key tracking: Space-Saving counters per worker, how many heavy hitters
+    # to report, and the Redis merge window / sync interval in seconds
+    HOT_KEYS_CAPACITY: int = 1000
+    HOT_KEYS_TOP_K: int = 20
+    HOT_KEYS_WINDOW: int = 60
+    HOT_KEYS_SYNC_INTERVAL: float = 10.0
+
+    # Unique visitors: redirects are buffered per worker (at most
+    # VISITOR_BUFFER_SIZE visitors) and flushed to Redis HyperLogLogs every
+    # VISITOR_FLUSH_INTERVAL seconds; daily HLLs are kept for VISITOR_RETENTION_DAYS,
+    # the lifetime HLL until a link has had no visits for VISITOR_LIFETIME_IDLE_DAYS
+    VISITOR_BUFFER_SIZE: int = 50000
+    VISITOR_FLUSH_INTERVAL: float = 1.0
+    VISITOR_RETENTION_DAYS: int = 90
+    VISITOR_LIFETIME_IDLE_DAYS: int = 365
+
+    # Clicks are counted per worker and added to links.click_count every
+    # CLICK_FLUSH_INTERVAL seconds, one batch per shard
+    CLICK_FLUSH_INTERVAL: float = 5.0
+
+    # Enables the /debug endpoints, which then require it as X-Debug-Token;
+    # they answer 404 while it is unset
+    DEBUG_TOKEN: Optional[str] = None
 
     class Config:
         env_file = ".env"
@@ -1,32 +1,95 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import Row, bindparam, exists, func, literal, or_, select, update, delete
 from sqlalchemy.orm import selectinload
-from .models import Link, IdempotencyKey
+from .database import shards
+from .models import AliasShard, ArchivedLink, Link, IdempotencyKey
 from typing import Optional, List
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Link CRUD
-async def create_link(db: AsyncSession, link: Link) -> Link:
-    db.add(link)
+async def create_link(db: AsyncSession, values: dict, unless_archived: bool = False) -> Optional[Link]:
+    # A single INSERT ... ON CONFLICT DO NOTHING RETURNING: no existence pre-check
+    # and no refresh. Returns None if short_code is already taken, or with
+    # unless_archived, if it is in this shard's archive (checked in the same
+    # statement, as INSERT ... SELECT ... WHERE NOT EXISTS).
+    stmt = shards.store_for(db).insert(Link)
+    if unless_archived:
+        columns = Link.__table__.c
+        row = select(*(literal(value, columns[key].type) for key, value in values.items())).where(
+            ~exists().where(ArchivedLink.short_code == values["short_code"])
+        )
+        stmt = stmt.from_select(list(values), row)
+    else:
+        stmt = stmt.values(**values)
+    stmt = stmt.on_conflict_do_nothing(index_elements=[Link.short_code]).returning(Link)
+    result = await db.execute(stmt)
+    link = result.scalar_one_or_none()
     await db.commit()
-    await db.refresh(link)
     return link
 
 async def get_link_by_short_code(db: AsyncSession, short_code: str) -> Optional[Link]:
     result = await db.execute(select(Link).where(Link.short_code == short_code))
     return result.scalar_one_or_none()
 
+# Redirects only need these columns. The statement is built once, so every call
+# reuses SQLAlchemy's compiled form and asyncpg's prepared statement for it, and
+# ix_links_short_code_covering answers it with an index-only scan.
+RESOLVE_LINK_STMT = (
+    select(Link.long_url, Link.tenant_id, Link.status, Link.expires_at, Link.redirect_type)
+    .where(Link.short_code == bindparam("short_code"))
+)
+
+async def resolve_link(db: AsyncSession, short_code: str) -> Optional[Row]:
+    result = await db.execute(RESOLVE_LINK_STMT, {"short_code": short_code})
+    return result.first()
+
+async def find_duplicate_link(
+    db: AsyncSession,
+    tenant_id: str,
+    url_hash: bytes,
+    long_url: str,
+    redirect_type: int,
+    expires_at: Optional[datetime],
+    ttl_tolerance: int,
+) -> Optional[Link]:
+    # Served by ix_links_tenant_url_hash. long_url is compared too, so a hash
+    # collision can never hand out the wrong destination. Not partition-prunable
+    # (links is partitioned on short_code): it probes that partial index on all
+    # 16 partitions. It only runs on creates by DEDUP_TENANTS, which are rate
+    # limited, never on redirects.
+    stmt = select(Link).where(
+        Link.tenant_id == tenant_id,
+        Link.url_hash == url_hash,
+        Link.status == "active",
+        Link.long_url == long_url,
+        Link.redirect_type == redirect_type,
+    )
+    if expires_at is None:
+        stmt = stmt.where(Link.expires_at.is_(None))
+    else:
+        stmt = stmt.where(Link.expires_at.between(expires_at, expires_at + timedelta(seconds=ttl_tolerance)))
+    result = await db.execute(stmt.order_by(Link.created_at.desc()).limit(1))
+    return result.scalar_one_or_none()
+
+# Not partition-prunable: links is partitioned on short_code, so this probes the
+# primary key index of every partition. Keep it off hot paths.
 async def get_link_by_id(db: AsyncSession, link_id: uuid.UUID) -> Optional[Link]:
     result = await db.execute(select(Link).where(Link.id == link_id))
     return result.scalar_one_or_none()
 
-async def update_link_click_count(db: AsyncSession, short_code: str):
-    await db.execute(
-        update(Link)
-        .where(Link.short_code == short_code)
-        .values(click_count=Link.click_count + 1)
-    )
+# One UPDATE per link, sent as a single executemany; each row prunes to one
+# partition. Built on the table, since ORM bulk updates only match on the
+# primary key (links' is (id, short_code)).
+links_table = Link.__table__
+ADD_CLICKS_STMT = (
+    update(links_table)
+    .where(links_table.c.short_code == bindparam("code"))
+    .values(click_count=links_table.c.click_count + bindparam("clicks"))
+)
+
+async def add_click_counts(db: AsyncSession, counts: dict[str, int]):
+    await db.execute(ADD_CLICKS_STMT, [{"code": code, "clicks": clicks} for code, clicks in counts.items()])
     await db.commit()
 
 async def soft_delete_link(db: AsyncSession, short_code: str, tenant_id: str) -> bool:
@@ -38,6 +101,104 @@ async def soft_delete_link(db: AsyncSession, short_code: str, tenant_id: str) ->
     await db.commit()
     return result.rowcount > 0
 
+# Tenant-wide status changes: action -> (statuses it applies to, new status)
+BULK_STATUS_TRANSITIONS = {
+    "disable": (["active"], "disabled"),
+    "enable": (["disabled"], "active"),
+    "expire": (["active", "disabled"], "expired"),
+}
+
+async def bulk_update_link_status(
+    db: AsyncSession, tenant_id: str, action: str, after: str, batch_size: int
+) -> list[str]:
+    # One keyset page over idx_links_tenant_short_code: updates up to batch_size
+    # of the tenant's links with short_code > after and returns their codes.
+    from_statuses, to_status = BULK_STATUS_TRANSITIONS[action]
+    batch = (
+        select(Link.short_code)
+        .where(Link.tenant_id == tenant_id, Link.short_code > after, Link.status.in_(from_statuses))
+        .order_by(Link.short_code)
+        .limit(batch_size)
+    )
+    if action == "enable":
+        # Never bring back a link that has passed its expiry.
+        batch = batch.where(or_(Link.expires_at.is_(None), Link.expires_at > func.now()))
+    result = await db.execute(
+        update(Link)
+        .where(Link.tenant_id == tenant_id, Link.short_code.in_(batch.scalar_subquery()))
+        .values(status=to_status)
+        .returning(Link.short_code)
+    )
+    codes = list(result.scalars())
+    await db.commit()
+    return codes
+
+# Archive
+ARCHIVED_COLUMNS = (
+    "short_code", "tenant_id", "long_url", "status", "redirect_type",
+    "click_count", "created_at", "expires_at", "updated_at",
+)
+
+async def archive_inactive_links(db: AsyncSession, cutoff: datetime, batch_size: int) -> list[str]:
+    # Moves up to batch_size links that have been inactive since before cutoff
+    # into links_archive, in one transaction, and returns their codes. Candidates come from
+    # ix_links_inactive_updated_at; the DELETE re-checks the status so a link
+    # re-enabled in the meantime stays put.
+    inactive = (Link.status != "active", Link.updated_at < cutoff)
+    batch = select(Link.short_code).where(*inactive).order_by(Link.updated_at).limit(batch_size)
+    result = await db.execute(
+        delete(Link)
+        .where(Link.short_code.in_(batch.scalar_subquery()), *inactive)
+        .returning(*(getattr(Link, column) for column in ARCHIVED_COLUMNS))
+    )
+    rows = [dict(row._mapping) for row in result]
+    if rows:
+        await db.execute(
+            shards.store_for(db).insert(ArchivedLink)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[ArchivedLink.short_code])
+        )
+    await db.commit()
+    return [row["short_code"] for row in rows]
+
+async def get_archived_link(db: AsyncSession, short_code: str) -> Optional[ArchivedLink]:
+    result = await db.execute(select(ArchivedLink).where(ArchivedLink.short_code == short_code))
+    return result.scalar_one_or_none()
+
+async def get_link_or_archived(db: AsyncSession, short_code: str) -> Optional[Link | ArchivedLink]:
+    return await get_link_by_short_code(db, short_code) or await get_archived_link(db, short_code)
+
+async def resolve_link_or_archived(db: AsyncSession, short_code: str) -> Optional[Row | ArchivedLink]:
+    return await resolve_link(db, short_code) or await get_archived_link(db, short_code)
+
+# Alias directory (default shard only)
+async def claim_alias_shard(db: AsyncSession, short_code: str, shard: str) -> bool:
+    # False if the alias is already registered to another shard.
+    await db.execute(
+        shards.store_for(db).insert(AliasShard)
+        .values(short_code=short_code, shard=shard)
+        .on_conflict_do_nothing(index_elements=[AliasShard.short_code])
+    )
+    await db.commit()
+    return await get_alias_shard(db, short_code) == shard
+
+async def get_alias_shard(db: AsyncSession, short_code: str) -> Optional[str]:
+    result = await db.execute(select(AliasShard.shard).where(AliasShard.short_code == short_code))
+    return result.scalar_one_or_none()
+
+# Well under asyncpg's 32767 bind parameters per statement.
+ALIAS_LOOKUP_CHUNK_SIZE = 5000
+
+async def get_alias_shards(db: AsyncSession, short_codes: list[str]) -> dict[str, str]:
+    found: dict[str, str] = {}
+    for start in range(0, len(short_codes), ALIAS_LOOKUP_CHUNK_SIZE):
+        chunk = short_codes[start:start + ALIAS_LOOKUP_CHUNK_SIZE]
+        result = await db.execute(
+            select(AliasShard.short_code, AliasShard.shard).where(AliasShard.short_code.in_(chunk))
+        )
+        found.update(result.all())
+    return found
+
 # Idempotency CRUD
 async def get_idempotency_key(db: AsyncSession, tenant_id: str, key: str) -> Optional[IdempotencyKey]:
     result = await db.execute(
@@ -1,13 +1,83 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from .config import settings
+from .storage import LinkStore, create_link_store
+from .utils import ALPHABET
 
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.ENVIRONMENT == "development")
-AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+DEFAULT_SHARD = "default"
+
+class ShardRegistry:
+    """One LinkStore per shard: DEFAULT_SHARD on DATABASE_URL plus SHARD_URLS.
+
+    Tenants are placed by SHARD_MAP and default to DEFAULT_SHARD. Every shard
+    other than the default is named by a single code character; codes generated
+    for its tenants start with it, so a redirect can find their shard from the
+    code alone (see services/shard_routing.py).
+    """
+
+    def __init__(self, default_url: str, shard_urls: dict[str, str], shard_map: dict[str, str]):
+        for shard in shard_urls:
+            if len(shard) != 1 or shard not in ALPHABET:
+                raise ValueError(f"Shard id must be a single code character: {shard!r}")
+        for tenant_id, shard in shard_map.items():
+            if shard != DEFAULT_SHARD and shard not in shard_urls:
+                raise ValueError(f"SHARD_MAP sends tenant {tenant_id!r} to unknown shard {shard!r}")
+        self.stores: dict[str, LinkStore] = {DEFAULT_SHARD: create_link_store(default_url, DEFAULT_SHARD)}
+        self.stores.update({shard: create_link_store(url, shard) for shard, url in shard_urls.items()})
+        self.shard_map = shard_map
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.stores)
+
+    def shard_for_tenant(self, tenant_id: str) -> str:
+        return self.shard_map.get(tenant_id, DEFAULT_SHARD)
+
+    def sessionmaker(self, shard: str) -> async_sessionmaker[AsyncSession]:
+        return self.stores[shard].sessionmaker
+
+    def store_for(self, db: AsyncSession) -> LinkStore:
+        # The store a session is bound to, for dialect-specific statements.
+        return next(store for store in self.stores.values() if store.engine is db.bind)
+
+    def sessionmaker_for_tenant(self, tenant_id: str) -> async_sessionmaker[AsyncSession]:
+        return self.sessionmaker(self.shard_for_tenant(tenant_id))
+
+shards = ShardRegistry(settings.DATABASE_URL, settings.SHARD_URLS, settings.SHARD_MAP)
+
+# The default shard, for code that is not tenant-scoped (scripts, migrations).
+link_store = shards.stores[DEFAULT_SHARD]
+engine = link_store.engine
+AsyncSessionLocal = link_store.sessionmaker
 
 class Base(DeclarativeBase):
     pass
 
+class ShardSessions:
+    """Sessions for one request, opened lazily per shard and closed with it."""
+
+    def __init__(self):
+        self._sessions: dict[str, AsyncSession] = {}
+
+    def shard(self, shard: str) -> AsyncSession:
+        if shard not in self._sessions:
+            self._sessions[shard] = shards.sessionmaker(shard)()
+        return self._sessions[shard]
+
+    def for_tenant(self, tenant_id: str) -> AsyncSession:
+        return self.shard(shards.shard_for_tenant(tenant_id))
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+async def get_shard_sessions():
+    sessions = ShardSessions()
+    try:
+        yield sessions
+    finally:
+        await sessions.close()
@@ -1,7 +1,21 @@
+import atexit
+import contextvars
+import copy
 import logging
-import json
+import logging.handlers
+import queue
+import random
 import sys
-from typing import Any
+from typing import Any, Optional
+
+import orjson
+
+from .config import settings
+from .observability import LOG_RECORDS_DROPPED_TOTAL
+
+# Set per request by RequestIdMiddleware; attached to every record logged while
+# handling that request.
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
 
 class JSONFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
@@ -12,23 +26,98 @@ class JSONFormatter(logging.Formatter):
             "module": record.module,
             "funcName": record.funcName,
         }
-        
-        if hasattr(record, "request_id"):
+
+        if getattr(record, "request_id", None):
             log_obj["request_id"] = record.request_id
-        
+
         if record.exc_info:
             log_obj["exception"] = self.formatException(record.exc_info)
-            
-        return json.dumps(log_obj)
+
+        return orjson.dumps(log_obj, default=str).decode()
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of routine records for the configured loggers.
+
+    Warnings and above are always kept, and so are access log lines for 4xx/5xx
+    responses.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.name)
+        if rate is None or rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        if _access_log_status(record) >= 400:
+            return True
+        return random.random() < rate
+
+def _access_log_status(record: logging.LogRecord) -> int:
+    # uvicorn.access args: (client_addr, method, full_path, http_version, status_code)
+    if record.name == "uvicorn.access" and isinstance(record.args, tuple) and len(record.args) == 5:
+        status = record.args[4]
+        if isinstance(status, int):
+            return status
+    return 0
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread without blocking the event loop.
+
+    Unlike the stdlib QueueHandler, formatting is left to the listener thread:
+    only the message arguments are merged here. When the queue is full the
+    record is dropped and counted instead of waiting for stdout to drain.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if not getattr(record, "request_id", None):
+            record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED_TOTAL.inc()
+
+class LogListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room instead of failing when stopping with a full queue.
+        self.queue.put(self._sentinel)
+
+_listener: Optional[LogListener] = None
+
+def _stop_listener():
+    # Flushes whatever is still queued.
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+atexit.register(_stop_listener)
 
 def setup_logging():
+    global _listener
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JSONFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+
+    _stop_listener()
+    _listener = LogListener(log_queue, stream_handler)
+    _listener.start()
+
     logger = logging.getLogger()
-    handler = logging.StreamHandler(sys.stdout)
-    formatter = JSONFormatter()
-    handler.setFormatter(formatter)
     logger.handlers = [handler]
     logger.setLevel(logging.INFO)
-    
+
     # Uvicorn loggers
     logging.getLogger("uvicorn.access").handlers = [handler]
     logging.getLogger("uvicorn.error").handlers = [handler]
@@ -1,28 +1,65 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
-from sqlalchemy.ext.asyncio import AsyncSession
-from .database import get_db
+from typing import Optional
+from .config import settings
+from .database import Base, ShardSessions, get_shard_sessions, shards
+from .models import ArchivedLink
+from .api import debug
 from .api.v1 import links
+from .utils import link_cache_ttl, link_cache_value, redirect_cache_control
 
-from .redis import redis_client
+from .storage import cache_store, counter_store
 
+from .services.admission import admission
+from .services.archival import archive_cold_links
 from .services.cleanup import delete_expired_links
+from .services.clicks import click_counter, flush_clicks
+from .services.hot_keys import hot_keys, sync_hot_keys
+from .services.loop_monitor import loop_monitor
+from .services.memory_profiler import memory_profiler
+from .services.rate_limiter import leased_rate_limiter
+from .services.shard_routing import find_on_shards
+from .services.visitors import flush_visitors, visitor_counter
 import asyncio
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
-    await redis_client.connect()
-    task = asyncio.create_task(delete_expired_links())
+    loop_monitor.start()
+    memory_profiler.start(settings.MEMORY_METRICS_INTERVAL)
+    for store in shards.stores.values():
+        await store.setup(Base.metadata)
+    await cache_store.connect()
+    if counter_store is not cache_store:
+        await counter_store.connect()
+    tasks = [
+        asyncio.create_task(delete_expired_links()),
+        asyncio.create_task(sync_hot_keys()),
+        asyncio.create_task(flush_visitors()),
+        asyncio.create_task(flush_clicks()),
+        asyncio.create_task(archive_cold_links()),
+    ]
     yield
     # Shutdown logic
-    task.cancel()
-    await redis_client.close()
-
-from .middleware import IdempotencyMiddleware
+    for task in tasks:
+        task.cancel()
+    # Let cancelled jobs release their sessions before the pools are disposed.
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await visitor_counter.flush()
+    await click_counter.flush()
+    await leased_rate_limiter.release_all()
+    await cache_store.close()
+    if counter_store is not cache_store:
+        await counter_store.close()
+    for store in shards.stores.values():
+        await store.dispose()
+    memory_profiler.stop()
+    loop_monitor.stop()
+
+from .middleware import IdempotencyMiddleware, RequestIdMiddleware
 from .observability import PrometheusMiddleware, metrics_endpoint
 from .logging_config import setup_logging
 
@@ -37,10 +74,12 @@ app = FastAPI(
 
 app.add_middleware(PrometheusMiddleware)
 app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.add_route("/metrics", metrics_endpoint)
 
 app.include_router(links.router, prefix="/v1")
+app.include_router(debug.router, prefix="/debug")
 
 @app.get("/health")
 async def health():
@@ -49,59 +88,80 @@ async def health():
 @app.get("/{short_code}")
 async def redirect_to_url(
     short_code: str,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    sessions: ShardSessions = Depends(get_shard_sessions)
 ):
-    from .crud import get_link_by_short_code, update_link_click_count
-    from .redis import redis_client
-    from .services.rate_limiter import check_rate_limit
+    from .crud import resolve_link_or_archived
     import json
-    
+
+    # Counted before the lookup: hot unknown codes cost a DB query each.
+    hot_keys.record(short_code)
+
     tenant_id = None
     target_url = None
+    redirect_type = 307
+    expires_at_ts = None
 
     # 1. Check Redis (Hot path)
-    cached_data = await redis_client.get(f"short:{short_code}")
+    cached_data = await cache_store.get(f"short:{short_code}")
     if cached_data:
         try:
             data = json.loads(cached_data)
+            if data.get("archived"):
+                raise HTTPException(status_code=410, detail="Link archived")
             target_url = data.get("long_url")
             tenant_id = data.get("tenant_id")
+            redirect_type = data.get("redirect_type", 307)
+            expires_at_ts = data.get("expires_at")
         except json.JSONDecodeError:
             # Fallback for old string format (if any legacy data)
             target_url = cached_data
     
     if target_url and tenant_id:
         # Rate Limit check for redirect (Loose: e.g. 100/min)
-        await check_rate_limit(tenant_id, 100, 60, "redirect")
-        return RedirectResponse(url=target_url)
-
-    # 2. DB Fallback
-    link = await get_link_by_short_code(db, short_code)
-    
-    if link:
-        if link.expires_at and link.expires_at < datetime.now(timezone.utc):
-             raise HTTPException(status_code=404, detail="Link expired")
-        if link.status != "active":
-             raise HTTPException(status_code=404, detail="Link disabled")
+        await leased_rate_limiter.check(tenant_id, 100, 60, "redirect")
+        click_counter.record(short_code)
+        visitor_counter.record(short_code, request)
+        return _redirect(target_url, redirect_type, expires_at_ts)
+
+    # 2. DB Fallback: holds a database slot, so under overload it sheds with 503
+    # instead of queueing on the pool
+    async with admission.slot("redirect", sessions=sessions):
+        # The archive is checked on the same shard, so a miss costs queries on one shard only.
+        _, link = await find_on_shards(sessions, short_code, resolve_link_or_archived)
+
+        # 4. Cold tier: answered from a cached tombstone until it expires
+        if isinstance(link, ArchivedLink):
+            await cache_store.set(
+                f"short:{short_code}", json.dumps({"archived": True}), ex=settings.ARCHIVE_TOMBSTONE_TTL
+            )
+            raise HTTPException(status_code=410, detail="Link archived")
+
+        if link:
+            if link.expires_at and link.expires_at < datetime.now(timezone.utc):
+                 raise HTTPException(status_code=404, detail="Link expired")
+            if link.status != "active":
+                 raise HTTPException(status_code=404, detail="Link disabled")
         
-        tenant_id = link.tenant_id
-        target_url = link.long_url
+            tenant_id = link.tenant_id
+            target_url = link.long_url
 
-        # Rate Limit check (after DB fetch, but better than nothing)
-        await check_rate_limit(tenant_id, 100, 60, "redirect")
+            # Rate Limit check (after DB fetch, but better than nothing)
+            await leased_rate_limiter.check(tenant_id, 100, 60, "redirect")
 
-        # 3. Populate Redis
-        ttl = 86400
-        if link.expires_at:
-             delta = link.expires_at - datetime.now(timezone.utc)
-             ttl = int(delta.total_seconds())
-        
-        if ttl > 0:
-            cache_val = json.dumps({"long_url": target_url, "tenant_id": tenant_id})
-            await redis_client.set(f"short:{short_code}", cache_val, ex=ttl)
+            # 3. Populate Redis
+            ttl = link_cache_ttl(link.expires_at)
+            if ttl > 0:
+                cache_val = link_cache_value(target_url, tenant_id, link.redirect_type, link.expires_at)
+                await cache_store.set(f"short:{short_code}", cache_val, ex=ttl)
 
-        # Update stats
-        await update_link_click_count(db, short_code)
-        return RedirectResponse(url=target_url)
+            expires_at_ts = link.expires_at.timestamp() if link.expires_at else None
+            click_counter.record(short_code)
+            visitor_counter.record(short_code, request)
+            return _redirect(target_url, link.redirect_type, expires_at_ts)
 
     raise HTTPException(status_code=404, detail="Link not found")
+
+def _redirect(url: str, redirect_type: int, expires_at_ts: Optional[float]) -> RedirectResponse:
+    cache_control = redirect_cache_control(expires_at_ts, settings.REDIRECT_CACHE_MAX_AGE)
+    return RedirectResponse(url=url, status_code=redirect_type, headers={"Cache-Control": cache_control})
@@ -8,9 +8,19 @@ from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from uuid import uuid4
 
-from .database import AsyncSessionLocal
+from .database import shards
+from .logging_config import request_id_var
 from .models import IdempotencyKey
 
+class RequestIdMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        # Reuse the caller's/load balancer's ID when present so logs can be correlated.
+        request_id = request.headers.get("X-Request-Id") or uuid4().hex
+        request_id_var.set(request_id)
+        response = await call_next(request)
+        response.headers["X-Request-Id"] = request_id
+        return response
+
 class IdempotencyMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         # Only check for POST methods (or specific routes if needed)
@@ -37,7 +47,7 @@ class IdempotencyMiddleware(BaseHTTPMiddleware):
              # Let's assume for now idempotency works best with header.
              return await call_next(request)
 
-        async with AsyncSessionLocal() as db:
+        async with shards.sessionmaker_for_tenant(tenant_id)() as db:
             # 1. Check if key exists
             stmt = select(IdempotencyKey).where(
                 IdempotencyKey.tenant_id == tenant_id,
@@ -52,6 +62,8 @@ class IdempotencyMiddleware(BaseHTTPMiddleware):
                     status_code=int(existing.response_status),
                     media_type="application/json"
                 )
+            # Don't hold a pooled connection while the request itself runs.
+            await db.rollback()
 
             # 2. Process Request
             response = await call_next(request)
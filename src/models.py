@@ -1,38 +1,108 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import String, Boolean, DateTime, BigInteger, ForeignKey, CheckConstraint, Index, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import JSON, String, Boolean, DateTime, BigInteger, ForeignKey, CheckConstraint, Index, LargeBinary, SmallInteger, TypeDecorator, UniqueConstraint, Uuid
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from .database import Base
 
+class TZDateTime(TypeDecorator):
+    """timestamptz on Postgres. SQLite has no time zones, so values are stored
+    as naive UTC there and come back as aware UTC datetimes either way."""
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None and dialect.name != "postgresql":
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
 class Link(Base):
+    # Hash-partitioned on short_code (migrations 3c4d5e6f7a8b/4d5e6f7a8b9c), so
+    # short_code is part of the primary key and every lookup by code touches a
+    # single partition.
     __tablename__ = "links"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tenant_id: Mapped[str] = mapped_column(String, index=True, nullable=False)
-    short_code: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    tenant_id: Mapped[str] = mapped_column(String, nullable=False)
+    short_code: Mapped[str] = mapped_column(String, primary_key=True, nullable=False)
     long_url: Mapped[str] = mapped_column(String, nullable=False)
     status: Mapped[str] = mapped_column(String, default="active", nullable=False) # active, disabled, expired
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(TZDateTime, server_default=func.now())
+    expires_at: Mapped[Optional[datetime]] = mapped_column(TZDateTime, nullable=True)
     click_count: Mapped[int] = mapped_column(BigInteger, default=0)
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    redirect_type: Mapped[int] = mapped_column(SmallInteger, default=307, server_default="307", nullable=False) # 301, 302, 307, 308
+    updated_at: Mapped[datetime] = mapped_column(TZDateTime, server_default=func.now(), onupdate=func.now())
+    # sha256 of long_url, for per-tenant deduplication (see utils.hash_url)
+    url_hash: Mapped[Optional[bytes]] = mapped_column(LargeBinary(32), nullable=True)
 
     __table_args__ = (
         Index('idx_links_tenant_short_code', 'tenant_id', 'short_code'),
+        # Unique lookup index that also carries every column a redirect reads.
+        Index(
+            'ix_links_short_code_covering', 'short_code', unique=True,
+            postgresql_include=['long_url', 'tenant_id', 'status', 'expires_at', 'redirect_type'],
+        ),
+        Index(
+            'ix_links_active_expires_at', 'expires_at',
+            postgresql_where=text("status = 'active' AND expires_at IS NOT NULL"),
+            sqlite_where=text("status = 'active' AND expires_at IS NOT NULL"),
+        ),
+        Index(
+            'ix_links_tenant_url_hash', 'tenant_id', 'url_hash',
+            postgresql_where=text("status = 'active' AND url_hash IS NOT NULL"),
+            sqlite_where=text("status = 'active' AND url_hash IS NOT NULL"),
+        ),
+        # Archival candidates (services/archival.py)
+        Index(
+            'ix_links_inactive_updated_at', 'updated_at',
+            postgresql_where=text("status <> 'active'"),
+            sqlite_where=text("status <> 'active'"),
+        ),
+        {'postgresql_partition_by': 'HASH (short_code)'},
     )
 
+class ArchivedLink(Base):
+    # Cold tier: links inactive for ARCHIVE_RETENTION_DAYS are moved here out of
+    # links, so they no longer weigh on the indexes every redirect probes.
+    __tablename__ = "links_archive"
+
+    short_code: Mapped[str] = mapped_column(String, primary_key=True)
+    tenant_id: Mapped[str] = mapped_column(String, nullable=False)
+    long_url: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False) # status when archived: disabled, expired
+    redirect_type: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    click_count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(TZDateTime, nullable=False)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(TZDateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(TZDateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(TZDateTime, server_default=func.now())
+
+class AliasShard(Base):
+    # Custom aliases on shards other than the default, kept on the default shard.
+    # A lookup that misses there reads this to find the one shard to try next.
+    __tablename__ = "alias_shards"
+
+    short_code: Mapped[str] = mapped_column(String, primary_key=True)
+    shard: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(TZDateTime, server_default=func.now())
+
 class IdempotencyKey(Base):
     __tablename__ = "idempotency_keys"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
     tenant_id: Mapped[str] = mapped_column(String, nullable=False)
     key: Mapped[str] = mapped_column(String, nullable=False)
     response_status: Mapped[int] = mapped_column(BigInteger, nullable=False)
-    response_body: Mapped[dict] = mapped_column(JSONB, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    response_body: Mapped[dict] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(TZDateTime, server_default=func.now())
 
     __table_args__ = (
         UniqueConstraint('tenant_id', 'key', name='uq_idempotency_tenant_key'),
@@ -1,7 +1,16 @@
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
+import os
 import time
 
 # Metrics definitions
@@ -23,7 +32,137 @@ CACHE_MISSES = Counter("cache_misses_total", "Total cache misses")
 REDIRECT_TOTAL = Counter("redirect_total", "Total redirects")
 REDIRECT_404_TOTAL = Counter("redirect_404_total", "Total failed redirects (404)")
 RATE_LIMITED_TOTAL = Counter("rate_limited_total", "Total rate limited requests")
+LINK_DEDUP_LOOKUPS_TOTAL = Counter(
+    "link_dedup_lookups_total",
+    "Create requests checked for an existing link with the same URL",
+    ["result"]
+)
+LINK_DEDUP_ROWS_SAVED_TOTAL = Counter(
+    "link_dedup_rows_saved_total",
+    "Links not created because an existing active link was returned"
+)
+LOG_RECORDS_DROPPED_TOTAL = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the logging queue was full"
+)
+
+# Event loop and connection pool health
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when the loop monitor was due to wake up and when it ran",
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
+)
+EVENT_LOOP_SLOW_CALLBACKS_TOTAL = Counter(
+    "event_loop_slow_callbacks_total",
+    "Times the event loop was blocked for longer than the slow callback threshold"
+)
+ASYNCIO_TASKS = Gauge(
+    "asyncio_tasks",
+    "Live asyncio tasks on the event loop",
+    multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection from the pool",
+    ["shard"],
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
+)
+REDIS_POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "redis_pool_checkout_wait_seconds",
+    "Time spent waiting for a Redis connection from the pool",
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
+)
+# In multiprocess mode the default process collector is not exported, so
+# every worker reports its own memory (one series per pid).
+WORKER_RESIDENT_MEMORY_BYTES = Gauge(
+    "worker_resident_memory_bytes",
+    "Resident set size of the worker process",
+    multiprocess_mode="liveall"
+)
+TRACEMALLOC_TRACED_BYTES = Gauge(
+    "tracemalloc_traced_bytes",
+    "Memory currently traced by tracemalloc (0 while tracing is off)",
+    multiprocess_mode="liveall"
+)
+GC_PAUSE_SECONDS = Histogram(
+    "gc_pause_seconds",
+    "Duration of garbage collector runs by generation",
+    ["generation"],
+    buckets=[0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5]
+)
+GC_COLLECTED_OBJECTS_TOTAL = Counter(
+    "gc_collected_objects_total",
+    "Unreachable objects freed by the garbage collector by generation",
+    ["generation"]
+)
 
+HOT_KEY_REQUESTS = Gauge(
+    "hot_key_requests",
+    "Redirect requests for the Nth hottest short code over the last two merge windows",
+    ["rank"],
+    multiprocess_mode="livemax"
+)
+VISITOR_EVENTS_DROPPED_TOTAL = Counter(
+    "visitor_events_dropped_total",
+    "Redirects not counted towards unique visitors because the flush buffer was full"
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requests waiting for a database work slot",
+    ["route_class"],
+    multiprocess_mode="livesum"
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "admission_wait_seconds",
+    "Time admitted requests waited for a database work slot",
+    ["route_class"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+)
+ADMISSION_SHED_TOTAL = Counter(
+    "admission_shed_total",
+    "Requests rejected with 503 by admission control",
+    ["route_class", "reason"]
+)
+DB_QUERY_DURATION_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time by normalized statement fingerprint",
+    ["statement"],
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0]
+)
+DB_SLOW_QUERIES_TOTAL = Counter(
+    "db_slow_queries_total",
+    "Database statements slower than DB_SLOW_QUERY_THRESHOLD",
+    ["statement"]
+)
+DB_POOL_CONNECTIONS_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Database connections currently checked out of the pool",
+    ["shard"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Database connections open beyond DB_POOL_SIZE",
+    ["shard"],
+    multiprocess_mode="livesum"
+)
+REDIS_COMMAND_DURATION_SECONDS = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command round-trip time by command (PIPELINE for a whole pipeline)",
+    ["command"],
+    buckets=[0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1, 0.5]
+)
+LINKS_ARCHIVED_TOTAL = Counter(
+    "links_archived_total",
+    "Inactive links moved from links to links_archive",
+    ["shard"]
+)
+LINKS_INDEX_BYTES = Gauge(
+    "links_index_bytes",
+    "Total size of the links table indexes across partitions (Postgres only)",
+    ["shard"],
+    multiprocess_mode="mostrecent"
+)
 
 class PrometheusMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
@@ -44,12 +183,18 @@ class PrometheusMiddleware(BaseHTTPMiddleware):
         path = request.url.path # Caveat: high cardinality if many short codes.
         
         # Simplify path for metrics
-        if path.startswith("/v1/links/"):
+        if path.startswith("/v1/links/bulk/"):
+             metric_path = "/v1/links/bulk/{action}"
+        elif path.startswith("/v1/links/") and path.endswith("/stats"):
+             metric_path = "/v1/links/{code}/stats"
+        elif path.startswith("/v1/links/"):
              metric_path = "/v1/links/{code}"
         elif path == "/v1/links":
              metric_path = "/v1/links"
         elif path == "/metrics":
              metric_path = "/metrics"
+        elif path.startswith("/debug/"):
+             metric_path = "/debug"
         elif path == "/health":
              metric_path = "/health"
         elif len(path) > 1 and "/" not in path[1:]: # Root redirect /{code}
@@ -63,4 +208,10 @@ class PrometheusMiddleware(BaseHTTPMiddleware):
         return response
 
 def metrics_endpoint(request: Request):
+    # Under gunicorn every worker writes its metrics to PROMETHEUS_MULTIPROC_DIR;
+    # aggregate all of them so a scrape does not depend on which worker answers.
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
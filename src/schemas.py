@@ -1,5 +1,5 @@
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 
 class LinkCreate(BaseModel):
@@ -7,6 +7,7 @@ class LinkCreate(BaseModel):
     custom_alias: Optional[str] = Field(None, min_length=3, max_length=20, pattern="^[a-zA-Z0-9_-]+$")
     ttl_seconds: Optional[int] = Field(None, gt=0)
     tenant_id: Optional[str] = None # Can be from header or body
+    redirect_type: Literal[301, 302, 307, 308] = 307
 
 class LinkResponse(BaseModel):
     short_code: str
@@ -15,7 +16,23 @@ class LinkResponse(BaseModel):
     expires_at: Optional[datetime]
     created_at: datetime
     status: str
+    redirect_type: int
 
 class LinkMetadata(LinkResponse):
     click_count: int
     tenant_id: str
+    # Set once the link has been moved to the archive
+    archived_at: Optional[datetime] = None
+
+class LinkStats(BaseModel):
+    short_code: str
+    click_count: int
+    # Approximate (HyperLogLog, ~0.81% standard error); None if Redis is unavailable
+    unique_visitors: Optional[int]
+    unique_visitors_window: Optional[int]
+    window_days: int
+
+class BulkActionResponse(BaseModel):
+    tenant_id: str
+    action: str
+    updated: int
@@ -0,0 +1,169 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import HTTPException
+
+from ..config import settings
+from ..database import ShardSessions
+from ..observability import ADMISSION_QUEUE_DEPTH, ADMISSION_SHED_TOTAL, ADMISSION_WAIT_SECONDS
+
+# Highest priority first: when a slot frees up, queued redirects go before
+# queued creates, which go before metadata reads.
+ROUTE_CLASSES = ("redirect", "create", "metadata")
+MAX_FINISH_TAGS = 10000
+
+class AdmissionController:
+    """Bounds concurrent database work per worker and decides who goes next.
+
+    At most `capacity` requests hold a slot at once, and each route class at
+    most its own limit, so creates and metadata reads can never take every
+    connection away from redirects. Requests that cannot start immediately
+    wait in a per-class queue ordered by weighted-fair-queuing finish tags:
+    each tenant's next request is tagged max(class virtual time, tenant's last
+    tag) + 1/weight, and the smallest tag is served first, so a tenant with a
+    deep backlog only gets its weighted share. A request that would wait
+    longer than `max_wait`, or finds its class queue full, is shed with 503.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        class_limits: dict[str, int],
+        max_wait: float,
+        max_queue: int,
+        tenant_weights: dict[str, float],
+    ):
+        self.capacity = capacity
+        self.class_limits = class_limits
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.tenant_weights = tenant_weights
+        self._active = 0
+        self._class_active: defaultdict[str, int] = defaultdict(int)
+        self._queues: dict[str, list] = {route_class: [] for route_class in ROUTE_CLASSES}
+        self._waiting: defaultdict[str, int] = defaultdict(int)
+        self._virtual_time: defaultdict[str, float] = defaultdict(float)
+        self._finish_tags: dict[tuple[str, str], float] = {}
+        self._seq = itertools.count()
+
+    @asynccontextmanager
+    async def slot(
+        self, route_class: str, tenant_id: Optional[str] = None, sessions: Optional[ShardSessions] = None
+    ):
+        """Holds a slot for the block. Pass the request's sessions so their
+        connections go back to the pool before the slot does."""
+        await self.acquire(route_class, tenant_id)
+        try:
+            yield
+        finally:
+            try:
+                if sessions is not None:
+                    await sessions.close()
+            finally:
+                self.release(route_class)
+
+    def _has_room(self, route_class: str) -> bool:
+        return self._active < self.capacity and self._class_active[route_class] < self.class_limits[route_class]
+
+    def _grant(self, route_class: str):
+        self._active += 1
+        self._class_active[route_class] += 1
+
+    async def acquire(self, route_class: str, tenant_id: Optional[str] = None):
+        if not self._waiting[route_class] and self._has_room(route_class):
+            self._grant(route_class)
+            ADMISSION_WAIT_SECONDS.labels(route_class=route_class).observe(0.0)
+            return
+
+        if self._waiting[route_class] >= self.max_queue:
+            self._shed(route_class, "queue_full")
+
+        tenant = tenant_id or ""
+        tag = max(self._virtual_time[route_class], self._finish_tags.get((route_class, tenant), 0.0))
+        tag += 1.0 / self.tenant_weights.get(tenant, 1.0)
+        if len(self._finish_tags) >= MAX_FINISH_TAGS:
+            self._prune_finish_tags()
+        self._finish_tags[(route_class, tenant)] = tag
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queues[route_class], (tag, next(self._seq), waiter))
+        self._waiting[route_class] += 1
+        ADMISSION_QUEUE_DEPTH.labels(route_class=route_class).inc()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we gave up: hand the slot back.
+                self.release(route_class)
+            else:
+                self._abandon(route_class)
+            if isinstance(e, asyncio.TimeoutError):
+                self._shed(route_class, "timeout")
+            raise
+        ADMISSION_WAIT_SECONDS.labels(route_class=route_class).observe(time.perf_counter() - start)
+
+    def release(self, route_class: str):
+        self._active -= 1
+        self._class_active[route_class] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._active < self.capacity:
+            for route_class in ROUTE_CLASSES:
+                if self._waiting[route_class] and self._has_room(route_class):
+                    tag, _, waiter = heapq.heappop(self._queues[route_class])
+                    if waiter.done():
+                        # Timed out or cancelled; already taken off the count.
+                        break
+                    self._waiting[route_class] -= 1
+                    ADMISSION_QUEUE_DEPTH.labels(route_class=route_class).dec()
+                    self._virtual_time[route_class] = tag
+                    self._grant(route_class)
+                    waiter.set_result(None)
+                    break
+            else:
+                return
+
+    def _abandon(self, route_class: str):
+        # The waiter stays in the heap and is skipped when it reaches the top.
+        self._waiting[route_class] -= 1
+        ADMISSION_QUEUE_DEPTH.labels(route_class=route_class).dec()
+        if not self._waiting[route_class]:
+            self._queues[route_class].clear()
+
+    def _prune_finish_tags(self):
+        # Tags at or behind their class's virtual time no longer affect ordering.
+        self._finish_tags = {
+            key: tag for key, tag in self._finish_tags.items() if tag > self._virtual_time[key[0]]
+        }
+
+    def _shed(self, route_class: str, reason: str):
+        ADMISSION_SHED_TOTAL.labels(route_class=route_class, reason=reason).inc()
+        raise HTTPException(
+            status_code=503,
+            detail="Server is overloaded, retry later",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+        )
+
+def _class_limits(capacity: int) -> dict[str, int]:
+    return {
+        route_class: max(1, int(capacity * settings.ADMISSION_CLASS_SHARES.get(route_class, 1.0)))
+        for route_class in ROUTE_CLASSES
+    }
+
+# One slot per pooled connection, less those kept for middleware and background
+# jobs, so admitted requests never wait on the pool.
+_capacity = max(1, settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW - settings.ADMISSION_RESERVED_CONNECTIONS)
+admission = AdmissionController(
+    _capacity,
+    _class_limits(_capacity),
+    settings.ADMISSION_MAX_QUEUE_WAIT,
+    settings.ADMISSION_MAX_QUEUE,
+    settings.ADMISSION_TENANT_WEIGHTS,
+)
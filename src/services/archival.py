@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from ..config import settings
+from ..crud import archive_inactive_links
+from ..database import shards
+from ..observability import LINKS_ARCHIVED_TOTAL, LINKS_INDEX_BYTES
+from ..storage import cache_store, counter_store
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_LOCK_KEY = "lock:archive"
+
+# Index size of the partitioned links table: pg_indexes_size of the parent is
+# empty, so it is summed over the partitions.
+INDEX_BYTES_SQL = text(
+    "SELECT coalesce(sum(pg_indexes_size(i.inhrelid)), 0) FROM pg_inherits i "
+    "WHERE i.inhparent = 'links'::regclass"
+)
+
+async def archive_links():
+    for shard in shards.names:
+        await archive_shard_links(shard)
+
+async def archive_shard_links(shard: str) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.ARCHIVE_RETENTION_DAYS)
+    moved = 0
+    while True:
+        # One short transaction per batch, so the job never holds locks on
+        # more than ARCHIVE_BATCH_SIZE rows and can stop at any point.
+        async with shards.sessionmaker(shard)() as db:
+            codes = await archive_inactive_links(db, cutoff, settings.ARCHIVE_BATCH_SIZE)
+        # Cached metadata would otherwise show these as live links until it expires.
+        await cache_store.unlink_many([f"meta:{code}" for code in codes])
+        LINKS_ARCHIVED_TOTAL.labels(shard=shard).inc(len(codes))
+        moved += len(codes)
+        if len(codes) < settings.ARCHIVE_BATCH_SIZE:
+            break
+        await asyncio.sleep(0)
+    if moved:
+        logger.info(f"Archived {moved} links on shard {shard}.")
+    await record_index_size(shard)
+    return moved
+
+async def record_index_size(shard: str):
+    store = shards.stores[shard]
+    if store.engine.dialect.name != "postgresql":
+        return
+    async with store.engine.connect() as conn:
+        LINKS_INDEX_BYTES.labels(shard=shard).set(await conn.scalar(INDEX_BYTES_SQL))
+
+async def archive_cold_links():
+    while True:
+        # Sleeps first: nothing is urgent at startup, and it keeps the job
+        # from competing with the cleanup job's first run.
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL)
+        try:
+            # Leader-only, like the cleanup job
+            if await counter_store.acquire_lock(ARCHIVE_LOCK_KEY, max(settings.ARCHIVE_INTERVAL - 60, 1)):
+                await archive_links()
+            else:
+                logger.debug("Archival job already ran on another worker.")
+        except Exception as e:
+            logger.error(f"Error in archival job: {e}")
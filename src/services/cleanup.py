@@ -2,29 +2,49 @@ import asyncio
 import logging
 from sqlalchemy import update
 from datetime import datetime, timezone
-from ..database import AsyncSessionLocal
+from ..database import shards
 from ..models import Link
+from ..storage import cache_store, counter_store
 
 logger = logging.getLogger(__name__)
 
+CLEANUP_INTERVAL = 3600
+CLEANUP_LOCK_KEY = "lock:cleanup"
+
+async def expire_links():
+    for shard in shards.names:
+        await expire_shard_links(shard)
+
+async def expire_shard_links(shard: str):
+    logger.info(f"Running background cleanup job on shard {shard}...")
+    async with shards.sessionmaker(shard)() as db:
+        # Mark as expired
+        stmt = (
+            update(Link)
+            .where(Link.expires_at < datetime.now(timezone.utc))
+            .where(Link.status == "active")
+            .values(status="expired")
+            .returning(Link.short_code)
+        )
+        codes = list((await db.execute(stmt)).scalars())
+        await db.commit()
+    # Cached metadata still shows these links as active.
+    await cache_store.unlink_many([f"meta:{code}" for code in codes])
+    if codes:
+        logger.info(f"Expired {len(codes)} links.")
+
 async def delete_expired_links():
     while True:
         try:
-            logger.info("Running background cleanup job...")
-            async with AsyncSessionLocal() as db:
-                # Mark as expired
-                stmt = (
-                    update(Link)
-                    .where(Link.expires_at < datetime.now(timezone.utc))
-                    .where(Link.status == "active")
-                    .values(status="expired")
-                )
-                result = await db.execute(stmt)
-                await db.commit()
-                if result.rowcount > 0:
-                    logger.info(f"Expired {result.rowcount} links.")
+            # Every worker of every replica runs this loop; only the one holding
+            # the lock for this interval does the work. The lock expires a bit
+            # before the next run so it never blocks the following interval.
+            if await counter_store.acquire_lock(CLEANUP_LOCK_KEY, CLEANUP_INTERVAL - 60):
+                await expire_links()
+            else:
+                logger.debug("Cleanup job already ran on another worker.")
         except Exception as e:
             logger.error(f"Error in cleanup job: {e}")
         
         # Run every hour
-        await asyncio.sleep(3600)
+        await asyncio.sleep(CLEANUP_INTERVAL)
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+from ..config import settings
+from ..crud import add_click_counts, get_alias_shards
+from ..database import DEFAULT_SHARD, shards
+from ..storage import cache_store
+from .shard_routing import home_shard, is_sharded_code
+
+logger = logging.getLogger(__name__)
+
+class ClickCounter:
+    """Counts redirects per short code in memory and adds them to
+    links.click_count in one batched UPDATE per shard.
+
+    Every redirect is counted, including those answered from the cache, and
+    none of them waits on a database write. Counts a failed flush did not
+    write are kept for the next one; counts buffered in a worker that dies
+    before its next flush are lost.
+    """
+
+    def __init__(self):
+        self._pending: dict[str, int] = defaultdict(int)
+
+    def record(self, short_code: str):
+        self._pending[short_code] += 1
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, defaultdict(int)
+        by_shard: dict[str, dict[str, int]] = defaultdict(dict)
+        for short_code, clicks in pending.items():
+            by_shard[home_shard(short_code)][short_code] = clicks
+        written: set[str] = set()
+        try:
+            if len(shards.names) > 1 and by_shard.get(DEFAULT_SHARD):
+                # Aliases on other shards; one directory lookup for the whole batch.
+                default = by_shard[DEFAULT_SHARD]
+                async with shards.sessionmaker(DEFAULT_SHARD)() as db:
+                    aliases = await get_alias_shards(db, [code for code in default if not is_sharded_code(code)])
+                for short_code, shard in aliases.items():
+                    by_shard[shard][short_code] = default.pop(short_code)
+            for shard, counts in by_shard.items():
+                if counts:
+                    async with shards.sessionmaker(shard)() as db:
+                        await add_click_counts(db, counts)
+                written.add(shard)
+        except BaseException:
+            # Each shard's counts are one transaction: put back the shards
+            # that were not written so the next flush retries them.
+            for shard, counts in by_shard.items():
+                if shard not in written:
+                    for short_code, clicks in counts.items():
+                        self._pending[short_code] += clicks
+            raise
+        await cache_store.unlink_many([f"meta:{code}" for code in pending])
+
+click_counter = ClickCounter()
+
+async def flush_clicks():
+    while True:
+        await asyncio.sleep(settings.CLICK_FLUSH_INTERVAL)
+        try:
+            await click_counter.flush()
+        except Exception as e:
+            logger.error(f"Error flushing click counts: {e}")
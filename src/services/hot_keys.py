@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from ..config import settings
+from ..observability import HOT_KEY_REQUESTS
+from ..storage import counter_store
+
+logger = logging.getLogger(__name__)
+
+HOT_KEYS_PREFIX = "hotkeys"
+
+class SpaceSaving:
+    """Space-Saving top-K summary over a stream of keys.
+
+    At most `capacity` keys are tracked. When a new key arrives and the summary
+    is full, it takes over the slot of a key with the smallest count and
+    inherits that count as its error, so counts are upper bounds that are off
+    by at most `error`. Keys are grouped in buckets by count; since every
+    update is +1, a key only ever moves to the next bucket and both updates
+    and evictions are O(1).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = 0
+        self._counts: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+        self._buckets: defaultdict[int, set[str]] = defaultdict(set)
+        self._min = 0
+
+    def record(self, key: str):
+        self.total += 1
+        count = self._counts.get(key)
+        if count is None:
+            if len(self._counts) < self.capacity:
+                count = 0
+            else:
+                count = self._min
+                victim = self._buckets[count].pop()
+                del self._counts[victim]
+                self._errors.pop(victim, None)
+                self._errors[key] = count
+        if count:
+            bucket = self._buckets[count]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[count]
+                if self._min == count:
+                    self._min = count + 1
+        else:
+            self._min = 1
+        self._counts[key] = count + 1
+        self._buckets[count + 1].add(key)
+
+    def top(self, n: int) -> list[tuple[str, int, int]]:
+        # (key, count, error), highest count first
+        keys = sorted(self._counts, key=self._counts.__getitem__, reverse=True)[:n]
+        return [(key, self._counts[key], self._errors.get(key, 0)) for key in keys]
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+class HotKeyTracker:
+    """Per-worker Space-Saving summary of redirected short codes, merged across
+    workers and replicas through Redis.
+
+    Each sync pushes the local top entries into the sorted set of the current
+    window (ZINCRBY) and starts a fresh local summary, then reads back the top
+    of the current and previous windows. The merged list is what `heavy_hitters`
+    returns.
+    """
+
+    def __init__(self, capacity: int, top_k: int, window: int):
+        self.top_k = top_k
+        self.window = window
+        self.local = SpaceSaving(capacity)
+        self._heavy_hitters: list[tuple[str, float]] = []
+        self._pinned: frozenset[str] = frozenset()
+
+    def record(self, short_code: str):
+        self.local.record(short_code)
+
+    def heavy_hitters(self) -> list[tuple[str, float]]:
+        return self._heavy_hitters
+
+    def is_hot(self, short_code: str) -> bool:
+        return short_code in self._pinned
+
+    def _window_keys(self, now: float) -> list[str]:
+        current = int(now // self.window)
+        return [f"{HOT_KEYS_PREFIX}:{current}", f"{HOT_KEYS_PREFIX}:{current - 1}"]
+
+    async def sync(self):
+        summary, self.local = self.local, SpaceSaving(self.local.capacity)
+        keys = self._window_keys(time.time())
+        if summary.total:
+            counts = {code: count for code, count, _ in summary.top(self.top_k)}
+            # Two windows are read back, so keep each for a bit longer than that.
+            await counter_store.zincrby_many(keys[0], counts, ttl=self.window * 3)
+
+        heavy_hitters = await counter_store.zunion_top(keys, self.top_k)
+        if heavy_hitters is None:
+            # Redis unavailable: fall back to what this worker saw.
+            heavy_hitters = [(code, float(count)) for code, count, _ in summary.top(self.top_k)]
+        self._heavy_hitters = heavy_hitters
+        self._pinned = frozenset(code for code, _ in heavy_hitters)
+
+        # Fixed rank labels keep the series count at top_k regardless of which
+        # codes are hot; the codes themselves are on the debug endpoint.
+        for rank in range(self.top_k):
+            HOT_KEY_REQUESTS.labels(rank=str(rank + 1)).set(heavy_hitters[rank][1] if rank < len(heavy_hitters) else 0)
+
+hot_keys = HotKeyTracker(
+    settings.HOT_KEYS_CAPACITY, settings.HOT_KEYS_TOP_K, settings.HOT_KEYS_WINDOW
+)
+
+async def sync_hot_keys():
+    while True:
+        await asyncio.sleep(settings.HOT_KEYS_SYNC_INTERVAL)
+        try:
+            await hot_keys.sync()
+        except Exception as e:
+            logger.error(f"Error syncing hot keys: {e}")
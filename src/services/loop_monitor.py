@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from ..config import settings
+from ..observability import (
+    ASYNCIO_TASKS,
+    EVENT_LOOP_LAG_SECONDS,
+    EVENT_LOOP_SLOW_CALLBACKS_TOTAL,
+)
+
+logger = logging.getLogger(__name__)
+
+class LoopMonitor:
+    """Measures event loop scheduling lag and reports callbacks that block the loop.
+
+    A sampler coroutine wakes up every `interval` seconds, records how late it
+    ran and leaves a heartbeat. A watchdog thread checks that heartbeat; when the
+    loop has not ticked for longer than `threshold`, it logs the loop thread's
+    stack at that moment, which points at the blocking call.
+    """
+
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+    async def _sample(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            EVENT_LOOP_LAG_SECONDS.observe(max(0.0, now - expected))
+            ASYNCIO_TASKS.set(len(asyncio.all_tasks()))
+
+    def _watch(self):
+        reported_heartbeat = None
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < self.threshold or heartbeat == reported_heartbeat:
+                continue
+
+            # Report each stall once, with the stack the loop thread is stuck in.
+            reported_heartbeat = heartbeat
+            EVENT_LOOP_SLOW_CALLBACKS_TOTAL.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>"
+            logger.warning(
+                "Event loop blocked for more than %.3fs; loop thread stack:\n%s",
+                blocked_for,
+                stack,
+            )
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL,
+    threshold=settings.SLOW_CALLBACK_THRESHOLD,
+)
@@ -0,0 +1,176 @@
+import asyncio
+import gc
+import logging
+import os
+import time
+import tracemalloc
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from ..config import settings
+from ..observability import (
+    GC_COLLECTED_OBJECTS_TOTAL,
+    GC_PAUSE_SECONDS,
+    TRACEMALLOC_TRACED_BYTES,
+    WORKER_RESIDENT_MEMORY_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Allocations made by the profiler itself and by the import system are noise.
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+def resident_memory_bytes() -> Optional[int]:
+    # Current RSS; /proc only (Linux), None elsewhere.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class MemoryProfiler:
+    """tracemalloc snapshots and GC instrumentation for one worker.
+
+    Tracing is off until started (it roughly doubles allocation cost), and
+    the last `max_snapshots` snapshots are kept for diffs. GC pauses are always
+    timed through gc.callbacks and exported with the gauges. Everything here is per process: under gunicorn
+    each /debug/memory request is answered by whichever worker accepts it,
+    identified by the pid in the response.
+    """
+
+    # Collections kept between gauge refreshes; older ones are dropped first.
+    MAX_GC_EVENTS = 10000
+
+    def __init__(self, max_snapshots: int):
+        self.max_snapshots = max_snapshots
+        self.snapshots: OrderedDict[int, tuple[datetime, tracemalloc.Snapshot]] = OrderedDict()
+        self._next_id = 1
+        self._gc_start: Optional[float] = None
+        # (generation, duration, collected) per collection, drained on the loop.
+        # The GC callback can run while prometheus_client holds its (non
+        # re-entrant) multiprocess lock, so it must never touch a metric itself.
+        self._gc_events: deque[tuple[str, float, int]] = deque(maxlen=self.MAX_GC_EVENTS)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, interval: float):
+        if self._on_gc not in gc.callbacks:
+            gc.callbacks.append(self._on_gc)
+        self._task = asyncio.create_task(self._refresh_gauges(interval))
+
+    def stop(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if self._task:
+            self._task.cancel()
+
+    def _on_gc(self, phase: str, info: dict):
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            self._gc_events.append((str(info["generation"]), time.perf_counter() - self._gc_start, info["collected"]))
+            self._gc_start = None
+
+    async def _refresh_gauges(self, interval: float):
+        while True:
+            self.update_gauges()
+            await asyncio.sleep(interval)
+
+    def update_gauges(self):
+        # Only what is queued now: observing allocates and may queue more.
+        for _ in range(len(self._gc_events)):
+            generation, duration, collected = self._gc_events.popleft()
+            GC_PAUSE_SECONDS.labels(generation=generation).observe(duration)
+            GC_COLLECTED_OBJECTS_TOTAL.labels(generation=generation).inc(collected)
+        rss = resident_memory_bytes()
+        if rss is not None:
+            WORKER_RESIDENT_MEMORY_BYTES.set(rss)
+        TRACEMALLOC_TRACED_BYTES.set(tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0)
+
+    # tracemalloc
+
+    def start_tracing(self, frames: int):
+        if tracemalloc.is_tracing():
+            return
+        tracemalloc.start(frames)
+        logger.info(f"tracemalloc started ({frames} frames)")
+
+    def stop_tracing(self):
+        # Snapshots are dropped with the traces; they cannot be compared to a later session.
+        tracemalloc.stop()
+        self.snapshots.clear()
+        self.update_gauges()
+
+    def take_snapshot(self) -> int:
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        snapshot_id = self._next_id
+        self._next_id += 1
+        self.snapshots[snapshot_id] = (datetime.now(timezone.utc), snapshot)
+        while len(self.snapshots) > self.max_snapshots:
+            self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    def top(self, snapshot_id: int, group_by: str, limit: int) -> list[dict]:
+        _, snapshot = self.snapshots[snapshot_id]
+        return [
+            {"site": _site(stat.traceback, group_by), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics(group_by)[:limit]
+        ]
+
+    def diff(self, base_id: int, snapshot_id: int, group_by: str, limit: int) -> list[dict]:
+        # Largest growth first; sites that shrank sort last.
+        _, base = self.snapshots[base_id]
+        _, snapshot = self.snapshots[snapshot_id]
+        return [
+            {
+                "site": _site(stat.traceback, group_by),
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in snapshot.compare_to(base, group_by)[:limit]
+        ]
+
+    def status(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "pid": os.getpid(),
+            "resident_memory_bytes": resident_memory_bytes(),
+            "tracemalloc": {
+                "tracing": tracemalloc.is_tracing(),
+                "frames": tracemalloc.get_traceback_limit(),
+                "traced_bytes": current,
+                "peak_traced_bytes": peak,
+                "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            },
+            "snapshots": [
+                {"id": snapshot_id, "taken_at": taken_at}
+                for snapshot_id, (taken_at, _) in self.snapshots.items()
+            ],
+            "gc": {
+                "counts": gc.get_count(),
+                "thresholds": gc.get_threshold(),
+                "generations": gc.get_stats(),
+                "uncollectable": len(gc.garbage),
+            },
+        }
+
+def _site(traceback: tracemalloc.Traceback, group_by: str) -> str:
+    frame = traceback[0]
+    if group_by == "filename":
+        return frame.filename
+    return f"{frame.filename}:{frame.lineno}"
+
+def object_counts(limit: int) -> list[dict]:
+    # Walks every GC-tracked object, so it blocks the loop for a moment on a
+    # large heap. Atomic objects such as str and int are not tracked.
+    counts = Counter(type(obj).__qualname__ for obj in gc.get_objects())
+    return [{"type": name, "count": count} for name, count in counts.most_common(limit)]
+
+memory_profiler = MemoryProfiler(max_snapshots=settings.MEMORY_MAX_SNAPSHOTS)
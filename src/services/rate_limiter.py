@@ -1,6 +1,8 @@
 from fastapi import Request, HTTPException, Response
-from ..redis import redis_client
+from ..storage import counter_store
 from ..config import settings
+import asyncio
+import math
 import time
 import logging
 
@@ -13,10 +15,6 @@ class RateLimiter:
         self.check_header = check_header
 
     async def __call__(self, request: Request, response: Response):
-        if not redis_client.client:
-             # Graceful degradation: Allow if Redis is down
-             return
-
         tenant_id = None
         if self.check_header:
             tenant_id = request.headers.get("X-Tenant-Id")
@@ -40,11 +38,9 @@ class RateLimiter:
             current_window = int(time.time() / self.window)
             redis_key = f"{key}:{current_window}"
             
-            count = await redis_client.client.incr(redis_key)
-            if count == 1:
-                await redis_client.client.expire(redis_key, self.window)
-            
-            if count > self.requests:
+            count = await counter_store.incr(redis_key, self.window)
+            # count is None when the store is down: graceful degradation -> Allow
+            if count is not None and count > self.requests:
                 raise HTTPException(status_code=429, detail="Rate limit exceeded")
                 
         except Exception as e:
@@ -55,20 +51,85 @@ class RateLimiter:
             pass
 
 async def check_rate_limit(tenant_id: str, limit: int, window: int, key_prefix: str):
-    if not redis_client.client:
-        return
-
     try:
         current_window = int(time.time() / window)
         redis_key = f"rate:{tenant_id}:{key_prefix}:{current_window}"
         
-        count = await redis_client.client.incr(redis_key)
-        if count == 1:
-            await redis_client.client.expire(redis_key, window)
-        
-        if count > limit:
+        count = await counter_store.incr(redis_key, window)
+        if count is not None and count > limit:
             raise HTTPException(status_code=429, detail="Rate limit exceeded")
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
         logger.error(f"Rate limiter manual check error: {e}")
+
+class QuotaLease:
+    __slots__ = ("window", "remaining", "exhausted", "lock")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.remaining = 0
+        self.exhausted = False
+        self.lock = asyncio.Lock()
+
+class LeasedRateLimiter:
+    """Fixed-window rate limiting that spends leased budget locally.
+
+    Instead of an INCR per request, each worker atomically claims a chunk of a
+    tenant's window budget from Redis and spends it in memory, going back to
+    Redis only when the lease runs out or the window rolls over. Claims are
+    capped at the limit, so workers together never admit more than `limit`
+    requests per window. `precision` is the chunk size as a fraction of the
+    limit: larger chunks mean fewer Redis calls, but up to (workers - 1) * chunk
+    of the budget can sit unspent in other workers' leases when a tenant nears
+    its limit. Uses the same Redis keys as check_rate_limit.
+    """
+
+    MAX_LEASES = 10000
+
+    def __init__(self, precision: float):
+        self.precision = precision
+        self._leases: dict[tuple[str, str], QuotaLease] = {}
+
+    async def check(self, tenant_id: str, limit: int, window: int, key_prefix: str):
+        if self.precision <= 0:
+            return await check_rate_limit(tenant_id, limit, window, key_prefix)
+
+        current_window = int(time.time() / window)
+        lease = self._leases.get((tenant_id, key_prefix))
+        if lease is None or lease.window != current_window:
+            lease = self._new_lease(tenant_id, key_prefix, current_window)
+
+        if lease.remaining <= 0 and not lease.exhausted:
+            async with lease.lock:
+                # Another request may have refilled the lease while we waited.
+                if lease.remaining <= 0 and not lease.exhausted:
+                    redis_key = f"rate:{tenant_id}:{key_prefix}:{current_window}"
+                    chunk = max(1, math.ceil(limit * self.precision))
+                    granted = await counter_store.claim_quota(redis_key, limit, chunk, window)
+                    if granted is None:
+                        # Graceful degradation -> Allow
+                        return
+                    lease.remaining += granted
+                    lease.exhausted = granted == 0
+
+        if lease.remaining <= 0:
+            raise HTTPException(status_code=429, detail="Rate limit exceeded")
+        lease.remaining -= 1
+
+    def _new_lease(self, tenant_id: str, key_prefix: str, window: int) -> QuotaLease:
+        if len(self._leases) >= self.MAX_LEASES:
+            # Drop leases from past windows; their budget has expired in Redis anyway.
+            self._leases = {k: v for k, v in self._leases.items() if v.window >= window}
+        lease = self._leases[(tenant_id, key_prefix)] = QuotaLease(window)
+        return lease
+
+    async def release_all(self):
+        # Give unspent budget back on shutdown so other workers can use it.
+        for (tenant_id, key_prefix), lease in self._leases.items():
+            if lease.remaining > 0:
+                redis_key = f"rate:{tenant_id}:{key_prefix}:{lease.window}"
+                await counter_store.release_quota(redis_key, lease.remaining)
+                lease.remaining = 0
+
+leased_rate_limiter = LeasedRateLimiter(precision=settings.RATE_LIMIT_LEASE_PRECISION)
@@ -0,0 +1,55 @@
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud import get_alias_shard
+from ..database import DEFAULT_SHARD, ShardSessions, shards
+from ..storage import cache_store
+from ..utils import generate_random_code
+
+# Codes generated on a non-default shard: the shard id followed by this many
+# random characters. Legacy/default codes are 7 characters, so the two can
+# never collide.
+SHARDED_CODE_LENGTH = 8
+
+def shard_key(short_code: str) -> str:
+    return f"shard:{short_code}"
+
+def new_short_code(shard: str) -> str:
+    if shard == DEFAULT_SHARD:
+        return generate_random_code()
+    return shard + generate_random_code(SHARDED_CODE_LENGTH - 1)
+
+def is_sharded_code(short_code: str) -> bool:
+    # Custom aliases in this format are rejected, so it only matches generated codes.
+    return len(short_code) == SHARDED_CODE_LENGTH and short_code[0] in shards.stores
+
+def home_shard(short_code: str) -> str:
+    # Where a code lives unless it is an alias listed in alias_shards.
+    return short_code[0] if is_sharded_code(short_code) else DEFAULT_SHARD
+
+async def alias_shard(sessions: ShardSessions, short_code: str) -> Optional[str]:
+    # alias_shards is durable; the cache entry only saves the query.
+    shard = await cache_store.get(shard_key(short_code))
+    if shard in shards.stores:
+        return shard
+    shard = await get_alias_shard(sessions.shard(DEFAULT_SHARD), short_code)
+    if shard is not None:
+        await cache_store.set(shard_key(short_code), shard)
+    return shard
+
+async def find_on_shards(
+    sessions: ShardSessions,
+    short_code: str,
+    fetch: Callable[[AsyncSession, str], Awaitable[Optional[Any]]],
+) -> tuple[Optional[str], Optional[Any]]:
+    # Runs fetch(db, short_code) on the one shard holding the code. Only a miss
+    # on the default shard looks up alias_shards, which is on the same database,
+    # so a code that exists nowhere costs queries on the default shard alone.
+    shard = home_shard(short_code)
+    result = await fetch(sessions.shard(shard), short_code)
+    if result is None and shard == DEFAULT_SHARD and len(shards.names) > 1:
+        shard = await alias_shard(sessions, short_code)
+        if shard is not None and shard != DEFAULT_SHARD:
+            result = await fetch(sessions.shard(shard), short_code)
+    return (shard, result) if result is not None else (None, None)
@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import Request
+
+from ..config import settings
+from ..observability import VISITOR_EVENTS_DROPPED_TOTAL
+from ..storage import counter_store
+
+logger = logging.getLogger(__name__)
+
+VISITOR_COOKIE = "vid"
+
+def visitor_id(request: Request) -> str:
+    # A first-party visitor cookie wins; otherwise IP + User-Agent. Only a
+    # digest goes to Redis, and HyperLogLog keeps no members anyway.
+    raw = request.cookies.get(VISITOR_COOKIE)
+    if not raw:
+        host = request.client.host if request.client else ""
+        raw = f"{host}|{request.headers.get('user-agent', '')}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+def day_key(short_code: str, day: date) -> str:
+    return f"hll:{short_code}:{day:%Y%m%d}"
+
+def total_key(short_code: str) -> str:
+    return f"hll:{short_code}"
+
+class VisitorCounter:
+    """Buffers (short code, visitor) pairs from redirects and flushes them to
+    per-link HyperLogLogs with one pipelined round of PFADDs.
+
+    Each link has a lifetime HLL and one per UTC day, each capped at ~12KB by
+    Redis regardless of traffic. Every flush pushes the lifetime HLL's expiry
+    out again, so it only goes away once a link stops being visited (deleted,
+    disabled or archived links are not counted). When the buffer is full, further visits are
+    dropped (and counted) until the next flush rather than slowing redirects.
+    """
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self._pending: dict[str, set[str]] = {}
+        self._size = 0
+
+    def record(self, short_code: str, request: Request):
+        if self._size >= self.max_pending:
+            VISITOR_EVENTS_DROPPED_TOTAL.inc()
+            return
+        visitors = self._pending.setdefault(short_code, set())
+        before = len(visitors)
+        visitors.add(visitor_id(request))
+        self._size += len(visitors) - before
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending, self._size = self._pending, {}, 0
+        today = datetime.now(timezone.utc).date()
+        ttl = (settings.VISITOR_RETENTION_DAYS + 1) * 86400
+        lifetime_ttl = settings.VISITOR_LIFETIME_IDLE_DAYS * 86400
+        entries = []
+        for short_code, visitors in pending.items():
+            members = list(visitors)
+            entries.append((total_key(short_code), members, lifetime_ttl))
+            entries.append((day_key(short_code, today), members, ttl))
+        await counter_store.pfadd_many(entries)
+
+visitor_counter = VisitorCounter(settings.VISITOR_BUFFER_SIZE)
+
+async def unique_visitors(short_code: str, days: int) -> tuple[Optional[int], Optional[int]]:
+    # (lifetime, last `days` UTC days including today). PFCOUNT over several
+    # keys merges them on the fly without storing the union.
+    today = datetime.now(timezone.utc).date()
+    window = [day_key(short_code, today - timedelta(days=i)) for i in range(days)]
+    return await counter_store.pfcount(total_key(short_code)), await counter_store.pfcount(*window)
+
+async def flush_visitors():
+    while True:
+        await asyncio.sleep(settings.VISITOR_FLUSH_INTERVAL)
+        try:
+            await visitor_counter.flush()
+        except Exception as e:
+            logger.error(f"Error flushing visitor counts: {e}")
@@ -0,0 +1,30 @@
+from ..config import settings
+from .base import CacheStore, CounterStore, LinkStore
+from .memory import MemoryStore
+from .redis import RedisClient
+from .sql import PostgresLinkStore, SQLiteLinkStore, create_link_store
+
+def create_cache_store(backend: str):
+    if backend == "redis":
+        return RedisClient()
+    if backend == "memory":
+        return MemoryStore(settings.MEMORY_STORE_MAX_KEYS, settings.MEMORY_STORE_MAX_BYTES)
+    raise ValueError(f"Unsupported CACHE_BACKEND: {backend}")
+
+# One backend object serves as both the cache and the counter store.
+cache_store: CacheStore = create_cache_store(settings.CACHE_BACKEND)
+counter_store: CounterStore = cache_store
+
+__all__ = [
+    "CacheStore",
+    "CounterStore",
+    "LinkStore",
+    "MemoryStore",
+    "PostgresLinkStore",
+    "RedisClient",
+    "SQLiteLinkStore",
+    "cache_store",
+    "counter_store",
+    "create_cache_store",
+    "create_link_store",
+]
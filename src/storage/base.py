@@ -0,0 +1,93 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from sqlalchemy import MetaData, Table
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.sql import Insert
+
+class LinkStore(ABC):
+    """Relational store for links and idempotency keys.
+
+    crud.py speaks SQLAlchemy Core/ORM against `sessionmaker`; a backend
+    provides the engine and the few dialect-specific pieces on top of that.
+    """
+
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker[AsyncSession]
+
+    @abstractmethod
+    def insert(self, table: Table) -> Insert:
+        """INSERT construct supporting on_conflict_do_nothing() and returning()."""
+
+    async def setup(self, metadata: MetaData):  # noqa: B027 - optional hook
+        """Prepare the schema at startup, for backends not managed by Alembic."""
+
+    async def dispose(self):
+        await self.engine.dispose()
+
+class CacheStore(ABC):
+    """Key/value cache for redirect targets and metadata responses.
+
+    Every method degrades instead of raising when the backend is unavailable:
+    reads miss and writes are dropped.
+    """
+
+    # Optional hooks: backends without connections keep the no-ops.
+    async def connect(self):  # noqa: B027
+        pass
+
+    async def close(self):  # noqa: B027
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ex: Optional[int] = None): ...
+
+    @abstractmethod
+    async def delete(self, key: str): ...
+
+    @abstractmethod
+    async def unlink_many(self, keys: list[str]): ...
+
+class CounterStore(ABC):
+    """Shared counters, locks and sketches: rate limits, quota leases, the
+    cleanup leader lock, hot-key merging and unique-visitor HyperLogLogs.
+
+    Methods returning Optional values return None when the backend is
+    unavailable, so callers can fail open.
+    """
+
+    # Optional hooks: backends without connections keep the no-ops.
+    async def connect(self):  # noqa: B027
+        pass
+
+    async def close(self):  # noqa: B027
+        pass
+
+    @abstractmethod
+    async def incr(self, key: str, ttl: int) -> Optional[int]:
+        """Increment a counter, starting its ttl on the first increment."""
+
+    @abstractmethod
+    async def claim_quota(self, key: str, limit: int, amount: int, ttl: int) -> Optional[int]:
+        """Grant up to `amount` units of a window budget of `limit`."""
+
+    @abstractmethod
+    async def release_quota(self, key: str, amount: int): ...
+
+    @abstractmethod
+    async def acquire_lock(self, key: str, ttl: int) -> bool: ...
+
+    @abstractmethod
+    async def zincrby_many(self, key: str, increments: dict[str, float], ttl: int): ...
+
+    @abstractmethod
+    async def zunion_top(self, keys: list[str], count: int) -> Optional[list[tuple[str, float]]]: ...
+
+    @abstractmethod
+    async def pfadd_many(self, entries: list[tuple[str, list[str], Optional[int]]]): ...
+
+    @abstractmethod
+    async def pfcount(self, *keys: str) -> Optional[int]: ...
@@ -0,0 +1,119 @@
+import hashlib
+import logging
+import random
+import re
+import time
+from functools import lru_cache
+
+import redis.asyncio as redis
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config import settings
+from ..observability import (
+    DB_POOL_CONNECTIONS_IN_USE,
+    DB_POOL_OVERFLOW,
+    DB_QUERY_DURATION_SECONDS,
+    DB_SLOW_QUERIES_TOTAL,
+    REDIS_COMMAND_DURATION_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Statements beyond this many distinct fingerprints are labelled "other", so a
+# stray dynamic query can never blow up the metric's cardinality.
+MAX_STATEMENT_FINGERPRINTS = 200
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\$\d+|%\(\w+\)s|\?")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+\"?(\w+)", re.IGNORECASE)
+
+# fingerprint -> normalized statement, for /debug/statements
+statement_fingerprints: dict[str, str] = {}
+
+def normalize_statement(statement: str) -> str:
+    # Literals and bind placeholders of every paramstyle become "?", IN lists collapse to one.
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _LITERALS.sub("?", normalized)
+    return _IN_LISTS.sub("(?)", normalized)
+
+@lru_cache(maxsize=1024)
+def statement_fingerprint(statement: str) -> str:
+    normalized = normalize_statement(statement)
+    verb = normalized.split(" ", 1)[0].lower()
+    table = _TABLE.search(normalized)
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:8]
+    fingerprint = f"{verb} {table.group(1) if table else '-'} {digest}"
+    if fingerprint not in statement_fingerprints:
+        if len(statement_fingerprints) >= MAX_STATEMENT_FINGERPRINTS:
+            return "other"
+        statement_fingerprints[fingerprint] = normalized
+    return fingerprint
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    fingerprint = statement_fingerprint(statement)
+    DB_QUERY_DURATION_SECONDS.labels(statement=fingerprint).observe(elapsed)
+    if elapsed >= settings.DB_SLOW_QUERY_THRESHOLD:
+        DB_SLOW_QUERIES_TOTAL.labels(statement=fingerprint).inc()
+        if random.random() < settings.DB_SLOW_QUERY_LOG_SAMPLE_RATE:
+            # Parameters are never logged; only their number.
+            logger.warning(
+                f"Slow query ({elapsed * 1000:.1f}ms) [{fingerprint}] "
+                f"{statement_fingerprints.get(fingerprint, normalize_statement(statement))} "
+                f"({len(parameters) if parameters else 0} params)"
+            )
+
+def _handle_error(context):
+    starts = context.connection.info.get("query_start") if context.connection else None
+    if starts:
+        starts.pop()
+
+def _update_pool_gauges(pool, shard: str, returning: bool = False):
+    # QueuePool only; StaticPool (in-memory SQLite) has no overflow to report.
+    if not hasattr(pool, "checkedout"):
+        return
+    in_use, overflow = pool.checkedout(), pool.overflow()
+    if returning:
+        # "checkin" fires before the pool takes the connection back; it is
+        # closed rather than queued (ending an overflow slot) if the queue is full.
+        in_use -= 1
+        if pool.checkedin() >= pool.size():
+            overflow -= 1
+    DB_POOL_CONNECTIONS_IN_USE.labels(shard=shard).set(in_use)
+    DB_POOL_OVERFLOW.labels(shard=shard).set(max(0, overflow))
+
+def instrument_engine(engine: Engine, shard: str):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    # Listeners carry over to the pool dispose() creates; engine.pool is read at
+    # call time so the gauges follow it.
+    event.listen(engine.pool, "checkout", lambda *args: _update_pool_gauges(engine.pool, shard))
+    event.listen(engine.pool, "checkin", lambda *args: _update_pool_gauges(engine.pool, shard, returning=True))
+
+class InstrumentedPipeline(redis.client.Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_DURATION_SECONDS.labels(command="PIPELINE").observe(time.perf_counter() - start)
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client that times every command (labelled by command name) and
+    every pipeline round trip."""
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION_SECONDS.labels(command=str(args[0]).upper()).observe(time.perf_counter() - start)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
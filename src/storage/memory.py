@@ -0,0 +1,207 @@
+import hashlib
+import math
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .base import CacheStore, CounterStore
+
+class HyperLogLog:
+    """HyperLogLog with 2^14 one-byte registers (~0.81% standard error), the
+    same precision as Redis's PFADD/PFCOUNT.
+
+    Like Redis, it starts sparse: only set registers are kept, in a dict, until
+    there are SPARSE_MAX_REGISTERS of them. It then switches to a dense 16KB
+    bytearray. Most links have few visitors and never get there.
+    """
+
+    P = 14
+    M = 1 << P
+    ALPHA = 0.7213 / (1 + 1.079 / M)
+    SPARSE_MAX_REGISTERS = 128
+
+    def __init__(self):
+        self.sparse: Optional[dict[int, int]] = {}
+        self.registers: Optional[bytearray] = None
+
+    def _set(self, index: int, rank: int):
+        if self.sparse is None:
+            if rank > self.registers[index]:
+                self.registers[index] = rank
+        elif rank > self.sparse.get(index, 0):
+            self.sparse[index] = rank
+            if len(self.sparse) > self.SPARSE_MAX_REGISTERS:
+                self._densify()
+
+    def _densify(self):
+        self.registers = bytearray(self.M)
+        for index, rank in self.sparse.items():
+            self.registers[index] = rank
+        self.sparse = None
+
+    def add(self, member: str):
+        h = int.from_bytes(hashlib.blake2b(member.encode(), digest_size=8).digest(), "big")
+        index = h >> (64 - self.P)
+        rest = h & ((1 << (64 - self.P)) - 1)
+        rank = (64 - self.P) - rest.bit_length() + 1
+        self._set(index, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        if other.sparse is not None:
+            for index, rank in other.sparse.items():
+                self._set(index, rank)
+            return
+        if self.sparse is not None:
+            self._densify()
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    @property
+    def nbytes(self) -> int:
+        # Approximate memory footprint, for MemoryStore's byte budget
+        if self.sparse is not None:
+            return sys.getsizeof(self.sparse) + 64 * len(self.sparse)
+        return sys.getsizeof(self.registers)
+
+    def count(self) -> int:
+        if self.sparse is not None:
+            zeros = self.M - len(self.sparse)
+            harmonic = zeros + sum(2.0 ** -r for r in self.sparse.values())
+        else:
+            zeros = self.registers.count(0)
+            harmonic = sum(2.0 ** -r for r in self.registers)
+        estimate = self.ALPHA * self.M * self.M / harmonic
+        if estimate <= 2.5 * self.M and zeros:
+            # Small-range correction (linear counting)
+            estimate = self.M * math.log(self.M / zeros)
+        return round(estimate)
+
+class MemoryStore(CacheStore, CounterStore):
+    """In-process cache and counter store for single-node deployments and tests.
+
+    Keys are kept in LRU order and capped at `max_keys` and at roughly
+    `max_bytes` of values; expired keys are dropped when touched or when they
+    reach the LRU end. State is per process, so under gunicorn every worker has
+    its own cache and its own rate-limit counters; run a single worker where
+    that matters.
+    """
+
+    # Per-entry overhead: the OrderedDict slot, entry tuple and float expiry
+    ENTRY_OVERHEAD = 150
+
+    def __init__(self, max_keys: int, max_bytes: int):
+        self.max_keys = max_keys
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: OrderedDict[str, tuple[Any, Optional[float], int]] = OrderedDict()
+
+    @classmethod
+    def _sizeof(cls, key: str, value: Any) -> int:
+        if isinstance(value, HyperLogLog):
+            size = value.nbytes
+        elif isinstance(value, dict):
+            size = sys.getsizeof(value) + 64 * len(value)
+        else:
+            size = sys.getsizeof(value)
+        return sys.getsizeof(key) + size + cls.ENTRY_OVERHEAD
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[2]
+
+    def _get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: str, value: Any, ttl: Optional[float] = None, keep_ttl: bool = False):
+        if keep_ttl and key in self._entries:
+            expires_at = self._entries[key][1]
+        else:
+            expires_at = time.monotonic() + ttl if ttl else None
+        self._remove(key)
+        size = self._sizeof(key, value)
+        self._entries[key] = (value, expires_at, size)
+        self.nbytes += size
+        while len(self._entries) > self.max_keys or (self.nbytes > self.max_bytes and len(self._entries) > 1):
+            self._remove(next(iter(self._entries)))
+
+    # CacheStore
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._get(key)
+
+    async def set(self, key: str, value: str, ex: Optional[int] = None):
+        self._put(key, value, ex)
+
+    async def delete(self, key: str):
+        self._remove(key)
+
+    async def unlink_many(self, keys: list[str]):
+        for key in keys:
+            self._remove(key)
+
+    # CounterStore
+
+    async def incr(self, key: str, ttl: int) -> Optional[int]:
+        count = (self._get(key) or 0) + 1
+        self._put(key, count, ttl, keep_ttl=count > 1)
+        return count
+
+    async def claim_quota(self, key: str, limit: int, amount: int, ttl: int) -> Optional[int]:
+        used = self._get(key) or 0
+        grant = min(amount, limit - used)
+        if grant <= 0:
+            return 0
+        self._put(key, used + grant, ttl, keep_ttl=used > 0)
+        return grant
+
+    async def release_quota(self, key: str, amount: int):
+        used = self._get(key)
+        if used is not None:
+            self._put(key, used - amount, keep_ttl=True)
+
+    async def acquire_lock(self, key: str, ttl: int) -> bool:
+        if self._get(key) is not None:
+            return False
+        self._put(key, "1", ttl)
+        return True
+
+    async def zincrby_many(self, key: str, increments: dict[str, float], ttl: int):
+        if not increments:
+            return
+        scores = self._get(key) or {}
+        for member, amount in increments.items():
+            scores[member] = scores.get(member, 0.0) + amount
+        self._put(key, scores, ttl)
+
+    async def zunion_top(self, keys: list[str], count: int) -> Optional[list[tuple[str, float]]]:
+        merged: dict[str, float] = {}
+        for key in keys:
+            for member, score in (self._get(key) or {}).items():
+                merged[member] = merged.get(member, 0.0) + score
+        return sorted(merged.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    async def pfadd_many(self, entries: list[tuple[str, list[str], Optional[int]]]):
+        for key, members, ttl in entries:
+            hll = self._get(key)
+            if hll is None:
+                hll = HyperLogLog()
+            for member in members:
+                hll.add(member)
+            self._put(key, hll, ttl, keep_ttl=not ttl)
+
+    async def pfcount(self, *keys: str) -> Optional[int]:
+        merged = HyperLogLog()
+        for key in keys:
+            hll = self._get(key)
+            if hll is not None:
+                merged.merge(hll)
+        return merged.count()
@@ -0,0 +1,179 @@
+import time
+import redis.asyncio as redis
+from ..config import settings
+from ..observability import REDIS_POOL_CHECKOUT_WAIT_SECONDS
+from .base import CacheStore, CounterStore
+from .instrumentation import InstrumentedRedis
+from typing import Optional
+
+class TimedConnectionPool(redis.ConnectionPool):
+    """Connection pool that records how long each command waits for a connection."""
+
+    async def get_connection(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().get_connection(*args, **kwargs)
+        finally:
+            REDIS_POOL_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+# Grants up to ARGV[2] units of a window budget of ARGV[1], never past the limit.
+CLAIM_QUOTA_SCRIPT = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+local grant = math.min(tonumber(ARGV[2]), tonumber(ARGV[1]) - used)
+if grant <= 0 then
+    return 0
+end
+redis.call('INCRBY', KEYS[1], grant)
+if used == 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return grant
+"""
+
+# Gives back unspent units, unless the window has already expired.
+RELEASE_QUOTA_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('DECRBY', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+class RedisClient(CacheStore, CounterStore):
+    def __init__(self):
+        self.client: Optional[InstrumentedRedis] = None
+
+    async def connect(self):
+        pool = TimedConnectionPool.from_url(
+            settings.REDIS_URL,
+            encoding="utf-8",
+            decode_responses=True
+        )
+        self.client = InstrumentedRedis.from_pool(pool)
+        await self.client.ping()
+        self._claim_quota = self.client.register_script(CLAIM_QUOTA_SCRIPT)
+        self._release_quota = self.client.register_script(RELEASE_QUOTA_SCRIPT)
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+
+    async def get(self, key: str) -> Optional[str]:
+        if not self.client:
+            return None
+        try:
+            return await self.client.get(key)
+        except redis.RedisError:
+            # Fallback behavior or log error
+            return None
+
+    async def set(self, key: str, value: str, ex: Optional[int] = None):
+        if not self.client:
+            return
+        try:
+            await self.client.set(key, value, ex=ex)
+        except redis.RedisError:
+            pass
+
+    async def unlink_many(self, keys: list[str], chunk_size: int = 500):
+        # Non-blocking deletes, several UNLINKs per round trip.
+        if not self.client or not keys:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for i in range(0, len(keys), chunk_size):
+                    pipe.unlink(*keys[i:i + chunk_size])
+                await pipe.execute()
+        except redis.RedisError:
+            pass
+
+    async def zincrby_many(self, key: str, increments: dict[str, float], ttl: int):
+        if not self.client or not increments:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for member, amount in increments.items():
+                    pipe.zincrby(key, amount, member)
+                pipe.expire(key, ttl)
+                await pipe.execute()
+        except redis.RedisError:
+            pass
+
+    async def zunion_top(self, keys: list[str], count: int) -> Optional[list[tuple[str, float]]]:
+        # Sums scores across keys and returns the `count` highest members;
+        # None when Redis is unavailable.
+        if not self.client:
+            return None
+        try:
+            merged = await self.client.zunion(keys, withscores=True)
+        except redis.RedisError:
+            return None
+        merged.sort(key=lambda item: item[1], reverse=True)
+        return [(member, score) for member, score in merged[:count]]
+
+    async def pfadd_many(self, entries: list[tuple[str, list[str], Optional[int]]]):
+        # (key, members, ttl) per HyperLogLog; ttl None leaves the key persistent.
+        if not self.client or not entries:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, members, ttl in entries:
+                    pipe.pfadd(key, *members)
+                    if ttl:
+                        pipe.expire(key, ttl)
+                await pipe.execute()
+        except redis.RedisError:
+            pass
+
+    async def pfcount(self, *keys: str) -> Optional[int]:
+        if not self.client:
+            return None
+        try:
+            return await self.client.pfcount(*keys)
+        except redis.RedisError:
+            return None
+
+    async def incr(self, key: str, ttl: int) -> Optional[int]:
+        if not self.client:
+            return None
+        try:
+            count = await self.client.incr(key)
+            if count == 1:
+                await self.client.expire(key, ttl)
+            return count
+        except redis.RedisError:
+            return None
+
+    async def acquire_lock(self, key: str, ttl: int) -> bool:
+        # Used so that periodic jobs run on one worker/replica per interval.
+        # Fails open: without Redis every worker runs the job, as before.
+        if not self.client:
+            return True
+        try:
+            return bool(await self.client.set(key, "1", nx=True, ex=ttl))
+        except redis.RedisError:
+            return True
+
+    async def claim_quota(self, key: str, limit: int, amount: int, ttl: int) -> Optional[int]:
+        # Returns the number of units granted, or None if Redis is unavailable.
+        if not self.client:
+            return None
+        try:
+            return int(await self._claim_quota(keys=[key], args=[limit, amount, ttl]))
+        except redis.RedisError:
+            return None
+
+    async def release_quota(self, key: str, amount: int):
+        if not self.client:
+            return
+        try:
+            await self._release_quota(keys=[key], args=[amount])
+        except redis.RedisError:
+            pass
+
+    async def delete(self, key: str):
+        if not self.client:
+            return
+        try:
+            await self.client.delete(key)
+        except redis.RedisError:
+            pass
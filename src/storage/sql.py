@@ -0,0 +1,98 @@
+import time
+
+from sqlalchemy import Table, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from sqlalchemy.sql import Insert
+
+from ..config import settings
+from ..observability import DB_POOL_CHECKOUT_WAIT_SECONDS
+from .base import LinkStore
+from .instrumentation import instrument_engine
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a connection,
+    labelled by its logging name (the shard; see pool_logging_name below)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT_SECONDS.labels(shard=self.logging_name).observe(time.perf_counter() - start)
+
+class PostgresLinkStore(LinkStore):
+    """Postgres via asyncpg; the schema is managed by Alembic migrations."""
+
+    def __init__(self, url: URL, shard: str):
+        if url.drivername == "postgresql+asyncpg":
+            # Per-connection cache of asyncpg prepared statements (SQLAlchemy default: 100).
+            url = url.update_query_dict(
+                {"prepared_statement_cache_size": str(settings.DB_PREPARED_STATEMENT_CACHE_SIZE)}
+            )
+        self.engine = create_async_engine(
+            url,
+            echo=settings.ENVIRONMENT == "development",
+            poolclass=TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            # Survives pool recreation on dispose(), unlike attributes set on the pool
+            pool_logging_name=shard,
+        )
+        instrument_engine(self.engine.sync_engine, shard)
+        self.sessionmaker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    def insert(self, table: Table) -> Insert:
+        return postgresql.insert(table)
+
+class SQLiteLinkStore(LinkStore):
+    """Embedded SQLite via aiosqlite, in WAL mode so reads never wait on the
+    single writer. There are no migrations for it: the schema is created from
+    the models at startup (Postgres-only options such as partitioning and
+    INCLUDE columns are ignored by the SQLite dialect).
+    """
+
+    def __init__(self, url: URL, shard: str):
+        if url.database in (None, "", ":memory:"):
+            # One shared connection, otherwise every checkout is a new empty database.
+            options = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+        else:
+            options = {
+                "poolclass": TimedQueuePool,
+                "pool_size": settings.DB_POOL_SIZE,
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+            }
+        self.engine = create_async_engine(
+            url, echo=settings.ENVIRONMENT == "development", pool_logging_name=shard, **options
+        )
+        event.listen(self.engine.sync_engine, "connect", self._configure_connection)
+        instrument_engine(self.engine.sync_engine, shard)
+        self.sessionmaker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints rather than every commit; safe with WAL.
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+    def insert(self, table: Table) -> Insert:
+        return sqlite.insert(table)
+
+    async def setup(self, metadata):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+
+def create_link_store(database_url: str, shard: str) -> LinkStore:
+    # `shard` labels the store's pool and connection metrics.
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        return PostgresLinkStore(url, shard)
+    if backend == "sqlite":
+        return SQLiteLinkStore(url, shard)
+    raise ValueError(f"Unsupported DATABASE_URL backend: {backend}")
@@ -1,7 +1,42 @@
+import hashlib
+import json
 import secrets
 import string
+import time
+from datetime import datetime, timezone
+from typing import Optional
 
 ALPHABET = string.ascii_letters + string.digits
 
 def generate_random_code(length: int = 7) -> str:
     return "".join(secrets.choice(ALPHABET) for _ in range(length))
+
+def hash_url(long_url: str) -> bytes:
+    # long_url is already normalized by pydantic's HttpUrl (lowercase scheme and
+    # host, default port dropped, path percent-encoding normalized), so equal
+    # URLs hash equally. Same as sha256(convert_to(long_url, 'UTF8')) in SQL.
+    return hashlib.sha256(long_url.encode()).digest()
+
+# Redirect cache entries (Redis key short:{code})
+DEFAULT_LINK_CACHE_TTL = 86400
+
+def link_cache_value(long_url: str, tenant_id: str, redirect_type: int, expires_at: Optional[datetime]) -> str:
+    return json.dumps({
+        "long_url": long_url,
+        "tenant_id": tenant_id,
+        "redirect_type": redirect_type,
+        "expires_at": expires_at.timestamp() if expires_at else None,
+    })
+
+def link_cache_ttl(expires_at: Optional[datetime]) -> int:
+    if not expires_at:
+        return DEFAULT_LINK_CACHE_TTL
+    return int((expires_at - datetime.now(timezone.utc)).total_seconds())
+
+def redirect_cache_control(expires_at_ts: Optional[float], max_age: int) -> str:
+    # Let browsers and CDNs reuse the redirect, but never past the link's expiry.
+    if expires_at_ts is not None:
+        max_age = min(max_age, int(expires_at_ts - time.time()))
+    if max_age <= 0:
+        return "no-store"
+    return f"public, max-age={max_age}"
@@ -0,0 +1,6 @@
+from uvicorn_worker import UvicornWorker
+
+class ProductionUvicornWorker(UvicornWorker):
+    """Gunicorn worker that serves the app on uvloop with the httptools parser."""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
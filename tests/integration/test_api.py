@@ -79,3 +79,244 @@ async def test_idempotency(client: AsyncClient):
 
     assert data1["short_code"] == data2["short_code"]
     assert data1["created_at"] == data2["created_at"]
+
+@pytest.mark.asyncio
+async def test_dedup_returns_existing_link(client: AsyncClient, monkeypatch):
+    from src.config import settings
+    monkeypatch.setattr(settings, "DEDUP_TENANTS", ["dedup-tenant"])
+    headers = {"X-Tenant-Id": "dedup-tenant"}
+    payload = {"long_url": "https://dedup.example.com/page"}
+
+    resp1 = await client.post("/v1/links", json=payload, headers=headers)
+    resp2 = await client.post("/v1/links", json=payload, headers=headers)
+    assert resp1.status_code == 201
+    assert resp2.status_code == 201
+    assert resp1.json()["short_code"] == resp2.json()["short_code"]
+
+    # A different TTL is not compatible with the permanent link
+    resp3 = await client.post("/v1/links", json={**payload, "ttl_seconds": 60}, headers=headers)
+    assert resp3.status_code == 201
+    assert resp3.json()["short_code"] != resp1.json()["short_code"]
+
+@pytest.mark.asyncio
+async def test_redirect_type_and_cache_control(client: AsyncClient):
+    payload = {"long_url": "https://permanent.example.com", "custom_alias": "perm-redirect", "redirect_type": 301}
+    await client.post("/v1/links", json=payload, headers={"X-Tenant-Id": "cache-tenant"})
+
+    response = await client.get("/perm-redirect")
+    assert response.status_code == 301
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+@pytest.mark.asyncio
+async def test_metadata_etag_revalidation(client: AsyncClient):
+    payload = {"long_url": "https://etag.example.com", "custom_alias": "etag-alias"}
+    await client.post("/v1/links", json=payload, headers={"X-Tenant-Id": "cache-tenant"})
+
+    response = await client.get("/v1/links/etag-alias")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"]
+
+    response = await client.get("/v1/links/etag-alias", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+@pytest.mark.asyncio
+async def test_bulk_disable_and_enable(client: AsyncClient):
+    headers = {"X-Tenant-Id": "bulk-tenant"}
+    for alias in ("bulk-one", "bulk-two"):
+        await client.post("/v1/links", json={"long_url": f"https://{alias}.example.com", "custom_alias": alias}, headers=headers)
+    # Warm the redirect cache so the disable has something to invalidate
+    assert (await client.get("/bulk-one", follow_redirects=False)).status_code == 307
+
+    response = await client.post("/v1/links/bulk/disable", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["updated"] == 2
+    assert (await client.get("/bulk-one", follow_redirects=False)).status_code == 404
+
+    response = await client.post("/v1/links/bulk/enable", headers=headers)
+    assert response.json()["updated"] == 2
+    assert (await client.get("/bulk-one", follow_redirects=False)).status_code == 307
+
+@pytest.mark.asyncio
+async def test_debug_endpoints_closed_without_token(client: AsyncClient):
+    assert (await client.get("/debug/hot-keys")).status_code == 404
+    assert (await client.post("/debug/memory/tracemalloc/start")).status_code == 404
+
+@pytest.mark.asyncio
+async def test_debug_endpoints_require_token(client: AsyncClient, debug_access):
+    response = await client.get("/debug/hot-keys", headers={"X-Debug-Token": "wrong"})
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_hot_keys_debug_endpoint(client: AsyncClient, debug_access):
+    payload = {"long_url": "https://hot.example.com", "custom_alias": "hot-alias"}
+    await client.post("/v1/links", json=payload, headers={"X-Tenant-Id": "hot-tenant"})
+    for _ in range(5):
+        await client.get("/hot-alias", follow_redirects=False)
+
+    response = await client.get("/debug/hot-keys")
+    assert response.status_code == 200
+    local = {entry["short_code"]: entry["requests"] for entry in response.json()["local"]}
+    assert local["hot-alias"] >= 5
+
+@pytest.mark.asyncio
+async def test_link_stats(client: AsyncClient):
+    from src.services.visitors import visitor_counter
+
+    payload = {"long_url": "https://stats.example.com", "custom_alias": "stats-alias"}
+    await client.post("/v1/links", json=payload, headers={"X-Tenant-Id": "stats-tenant"})
+    for i in range(50):
+        # Two visits per visitor cookie
+        for _ in range(2):
+            await client.get("/stats-alias", follow_redirects=False, headers={"Cookie": f"vid=visitor-{i}"})
+    await visitor_counter.flush()
+
+    response = await client.get("/v1/links/stats-alias/stats", params={"days": 30})
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["window_days"] == 30
+    # HyperLogLog is exact to within a visitor or so at this size
+    assert 48 <= stats["unique_visitors"] <= 52
+    assert 48 <= stats["unique_visitors_window"] <= 52
+
+    response = await client.get("/v1/links/missing-alias/stats")
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_query_metrics(client: AsyncClient, debug_access):
+    await client.get("/missing-code", follow_redirects=False)
+
+    response = await client.get("/metrics")
+    assert 'db_query_duration_seconds_count{statement="select links ' in response.text
+    statements = (await client.get("/debug/statements")).json()
+    assert any("FROM links" in sql for sql in statements.values())
+
+@pytest.mark.asyncio
+async def test_sharded_tenant_links(client: AsyncClient):
+    from src.config import settings
+    if settings.SHARD_MAP.get("sharded-tenant") not in settings.SHARD_URLS:
+        pytest.skip("needs a second shard (make test-embedded)")
+    shard = settings.SHARD_MAP["sharded-tenant"]
+    headers = {"X-Tenant-Id": "sharded-tenant"}
+
+    # Generated codes carry the shard id, so a redirect goes straight to it
+    response = await client.post("/v1/links", json={"long_url": "https://shard.example.com"}, headers=headers)
+    code = response.json()["short_code"]
+    assert code.startswith(shard) and len(code) == 8
+    assert (await client.get(f"/{code}", follow_redirects=False)).status_code == 307
+    assert (await client.get(f"/v1/links/{code}")).json()["tenant_id"] == "sharded-tenant"
+
+    payload = {"long_url": "https://shard.example.com/alias", "custom_alias": "shard-alias"}
+    assert (await client.post("/v1/links", json=payload, headers=headers)).status_code == 201
+    assert (await client.get("/shard-alias", follow_redirects=False)).status_code == 307
+
+    # Aliases are unique across shards
+    response = await client.post("/v1/links", json=payload, headers={"X-Tenant-Id": "other-tenant"})
+    assert response.status_code == 409
+
+    # The alias directory is durable: losing the cache entry does not lose the alias
+    from src.storage import cache_store
+    await cache_store.delete("shard:shard-alias")
+    await cache_store.delete("short:shard-alias")
+    assert (await client.get("/shard-alias", follow_redirects=False)).status_code == 307
+
+    # Aliases cannot take the generated sharded format
+    payload = {"long_url": "https://shard.example.com/fake", "custom_alias": shard + "fakecod"}
+    assert (await client.post("/v1/links", json=payload, headers={"X-Tenant-Id": "other-tenant"})).status_code == 400
+
+    # A miss queries the default shard only
+    from sqlalchemy import event
+    from src.database import shards
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(shards.stores[shard].engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        assert (await client.get("/nosuchcode", follow_redirects=False)).status_code == 404
+    finally:
+        event.remove(shards.stores[shard].engine.sync_engine, "before_cursor_execute", listener)
+    assert statements == []
+
+@pytest.mark.asyncio
+async def test_archived_link(client: AsyncClient, monkeypatch):
+    from src.config import settings
+    from src.services.archival import archive_links
+
+    headers = {"X-Tenant-Id": "archive-tenant"}
+    await client.post("/v1/links", json={"long_url": "https://cold.example.com", "custom_alias": "cold-link"}, headers=headers)
+    assert (await client.delete("/v1/links/cold-link", headers=headers)).status_code == 204
+    # Cached metadata is dropped when the link moves to the archive
+    assert (await client.get("/v1/links/cold-link")).json()["archived_at"] is None
+
+    # Everything inactive counts as past retention
+    monkeypatch.setattr(settings, "ARCHIVE_RETENTION_DAYS", -1)
+    await archive_links()
+
+    assert (await client.get("/cold-link", follow_redirects=False)).status_code == 410
+    # Served from the tombstone
+    assert (await client.get("/cold-link", follow_redirects=False)).status_code == 410
+    response = await client.get("/v1/links/cold-link")
+    assert response.status_code == 200
+    assert response.json()["archived_at"] is not None
+    # Archived codes stay reserved
+    response = await client.post("/v1/links", json={"long_url": "https://new.example.com", "custom_alias": "cold-link"}, headers=headers)
+    assert response.status_code == 409
+    # ...also for generated codes
+    codes = iter(["cold-link", "fresh01"])
+    monkeypatch.setattr("src.api.v1.links.new_short_code", lambda shard: next(codes))
+    response = await client.post("/v1/links", json={"long_url": "https://new.example.com"}, headers=headers)
+    assert response.json()["short_code"] == "fresh01"
+
+@pytest.mark.asyncio
+async def test_memory_debug_endpoints(client: AsyncClient, debug_access):
+    assert (await client.post("/debug/memory/snapshots")).status_code == 409
+    assert (await client.post("/debug/memory/tracemalloc/start")).json()["tracing"] is True
+    try:
+        base = (await client.post("/debug/memory/snapshots")).json()["id"]
+        retained = [bytearray(1024) for _ in range(1000)]  # noqa: F841
+        snapshot = (await client.post("/debug/memory/snapshots")).json()["id"]
+
+        response = await client.get("/debug/memory/diff", params={"base": base, "snapshot": snapshot})
+        assert response.status_code == 200
+        growth = max(entry["size_diff_bytes"] for entry in response.json()["diff"] if "test_api.py" in entry["site"])
+        assert growth >= 1000 * 1024
+
+        status = (await client.get("/debug/memory", params={"objects": 5})).json()
+        assert status["tracemalloc"]["traced_bytes"] > 0
+        assert len(status["objects"]) == 5
+        assert len(status["gc"]["generations"]) == 3
+    finally:
+        assert (await client.post("/debug/memory/tracemalloc/stop")).json()["tracing"] is False
+
+@pytest.mark.asyncio
+async def test_click_counts(client: AsyncClient):
+    from src.services.clicks import click_counter
+
+    payload = {"long_url": "https://clicks.example.com", "custom_alias": "clicks-alias"}
+    await client.post("/v1/links", json=payload, headers={"X-Tenant-Id": "clicks-tenant"})
+    # Written through to the cache on create, so both are cache hits
+    for _ in range(2):
+        assert (await client.get("/clicks-alias", follow_redirects=False)).status_code == 307
+    assert (await client.get("/v1/links/clicks-alias")).json()["click_count"] == 0
+
+    await click_counter.flush()
+    assert (await client.get("/v1/links/clicks-alias")).json()["click_count"] == 2
+
+@pytest.mark.asyncio
+async def test_failed_click_flush_keeps_counts(client: AsyncClient, monkeypatch):
+    from src.services import clicks
+
+    payload = {"long_url": "https://retry.example.com", "custom_alias": "retry-alias"}
+    await client.post("/v1/links", json=payload, headers={"X-Tenant-Id": "clicks-tenant"})
+    assert (await client.get("/retry-alias", follow_redirects=False)).status_code == 307
+
+    async def unavailable(db, counts):
+        raise ConnectionError("database unavailable")
+
+    add_click_counts = clicks.add_click_counts
+    monkeypatch.setattr(clicks, "add_click_counts", unavailable)
+    with pytest.raises(ConnectionError):
+        await clicks.click_counter.flush()
+    monkeypatch.setattr(clicks, "add_click_counts", add_click_counts)
+
+    await clicks.click_counter.flush()
+    assert (await client.get("/v1/links/retry-alias")).json()["click_count"] == 1
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.services.admission import AdmissionController
+
+def make_controller(**overrides) -> AdmissionController:
+    options = {
+        "capacity": 1,
+        "class_limits": {"redirect": 1, "create": 1, "metadata": 1},
+        "max_wait": 1.0,
+        "max_queue": 10,
+        "tenant_weights": {},
+    }
+    options.update(overrides)
+    return AdmissionController(**options)
+
+async def run_queued(controller: AdmissionController, requests: list[tuple[str, str]]) -> list[str]:
+    # Holds the only slot while `requests` queue up, then records the order they are admitted in.
+    order = []
+
+    async def request(route_class, tenant_id):
+        async with controller.slot(route_class, tenant_id):
+            order.append(f"{route_class}:{tenant_id}")
+
+    await controller.acquire("metadata")
+    tasks = []
+    for route_class, tenant_id in requests:
+        tasks.append(asyncio.create_task(request(route_class, tenant_id)))
+        await asyncio.sleep(0)
+    controller.release("metadata")
+    await asyncio.gather(*tasks)
+    return order
+
+async def test_redirects_are_admitted_before_creates():
+    order = await run_queued(make_controller(), [("create", "a"), ("redirect", "b")])
+    assert order == ["redirect:b", "create:a"]
+
+async def test_tenants_share_a_class_fairly():
+    requests = [("create", "noisy")] * 3 + [("create", "quiet")]
+    order = await run_queued(make_controller(), requests)
+    assert order == ["create:noisy", "create:quiet", "create:noisy", "create:noisy"]
+
+async def test_sheds_after_max_wait():
+    controller = make_controller(max_wait=0.01)
+    await controller.acquire("redirect")
+    with pytest.raises(HTTPException) as exc:
+        await controller.acquire("create", "a")
+    assert exc.value.status_code == 503
+    assert "Retry-After" in exc.value.headers
+
+    # The abandoned waiter does not hold on to the slot once it is released.
+    controller.release("redirect")
+    await asyncio.wait_for(controller.acquire("create", "a"), 0.1)
+
+async def test_sessions_close_before_slot_is_released():
+    controller = make_controller()
+    held_at_close = []
+
+    class Sessions:
+        async def close(self):
+            held_at_close.append(controller._active)
+
+    with pytest.raises(RuntimeError):
+        async with controller.slot("metadata", sessions=Sessions()):
+            raise RuntimeError("query failed")
+    assert held_at_close == [1]
+    assert controller._active == 0
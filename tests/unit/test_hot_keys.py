@@ -0,0 +1,46 @@
+import random
+from collections import Counter
+
+from src.services.hot_keys import SpaceSaving
+
+def check_invariants(summary: SpaceSaving, true_counts: Counter):
+    counts = {key: count for key, count, _ in summary.top(len(summary))}
+    assert len(counts) <= summary.capacity
+    assert summary._min == min(counts.values())
+    assert sum(counts.values()) == summary.total
+    for key, count, error in summary.top(len(summary)):
+        assert count >= true_counts[key]
+        assert count - error <= true_counts[key]
+        assert key in summary._buckets[count]
+
+def test_exact_below_capacity():
+    summary = SpaceSaving(capacity=10)
+    stream = ["a"] * 5 + ["b"] * 3 + ["c"]
+    for key in stream:
+        summary.record(key)
+    assert summary.top(3) == [("a", 5, 0), ("b", 3, 0), ("c", 1, 0)]
+
+def test_invariants_hold_through_evictions():
+    rng = random.Random(42)
+    keys = [f"k{i}" for i in range(200)]
+    weights = [1 / (i + 1) for i in range(200)]  # Zipf-like
+    summary = SpaceSaving(capacity=20)
+    true_counts = Counter()
+    for key in rng.choices(keys, weights, k=5000):
+        summary.record(key)
+        true_counts[key] += 1
+        check_invariants(summary, true_counts)
+
+    # Any key seen more than total / capacity times is guaranteed to be tracked
+    tracked = {key for key, _, _ in summary.top(20)}
+    heavy = {key for key, count in true_counts.items() if count > 5000 / 20}
+    assert heavy <= tracked
+
+def test_min_advances_when_min_bucket_empties():
+    summary = SpaceSaving(capacity=2)
+    for key in ["a", "b", "b"]:
+        summary.record(key)
+    assert summary._min == 1
+    summary.record("c")  # evicts "a" (count 1) and takes over its count
+    assert summary._min == 2
+    assert sorted(summary.top(2)) == [("b", 2, 0), ("c", 2, 1)]
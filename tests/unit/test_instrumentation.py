@@ -0,0 +1,39 @@
+from sqlalchemy import text
+
+from src.observability import DB_POOL_CHECKOUT_WAIT_SECONDS, DB_POOL_CONNECTIONS_IN_USE
+from src.storage.instrumentation import normalize_statement, statement_fingerprint
+from src.storage.sql import create_link_store
+
+def test_statements_differing_only_in_values_share_a_fingerprint():
+    a = "SELECT links.long_url FROM links WHERE links.short_code = 'abc' LIMIT 1"
+    b = "SELECT links.long_url\n  FROM links WHERE links.short_code = $1 LIMIT 20"
+    assert normalize_statement(a) == "SELECT links.long_url FROM links WHERE links.short_code = ? LIMIT ?"
+    assert statement_fingerprint(a) == statement_fingerprint(b)
+    assert statement_fingerprint(a).startswith("select links ")
+
+def test_in_lists_collapse():
+    three = "UPDATE links SET status=? WHERE links.short_code IN (?, ?, ?)"
+    one = "UPDATE links SET status=? WHERE links.short_code IN (?)"
+    assert statement_fingerprint(three) == statement_fingerprint(one)
+
+async def test_pool_metrics_are_labelled_by_shard(tmp_path):
+    first = create_link_store(f"sqlite+aiosqlite:///{tmp_path}/a.db", "pool-a")
+    second = create_link_store(f"sqlite+aiosqlite:///{tmp_path}/b.db", "pool-b")
+    async with first.engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        async with second.engine.connect() as other:
+            await other.execute(text("SELECT 1"))
+        assert DB_POOL_CONNECTIONS_IN_USE.labels(shard="pool-a")._value.get() == 1
+        assert DB_POOL_CONNECTIONS_IN_USE.labels(shard="pool-b")._value.get() == 0
+    # The label survives the pool being recreated by dispose()
+    await first.dispose()
+    async with first.engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await first.dispose()
+    await second.dispose()
+    waits = {
+        sample.labels["shard"]: sample.value
+        for sample in DB_POOL_CHECKOUT_WAIT_SECONDS.collect()[0].samples
+        if sample.name.endswith("_count")
+    }
+    assert waits["pool-a"] == 2 and waits["pool-b"] == 1
@@ -0,0 +1,26 @@
+import gc
+
+from src.observability import GC_PAUSE_SECONDS
+from src.services.memory_profiler import MemoryProfiler
+
+def gc_pauses(generation: str) -> float:
+    samples = GC_PAUSE_SECONDS.collect()[0].samples
+    return next(
+        (s.value for s in samples if s.name.endswith("_count") and s.labels["generation"] == generation), 0.0
+    )
+
+def test_gc_callback_only_queues_and_refresh_drains():
+    profiler = MemoryProfiler(max_snapshots=1)
+    before = gc_pauses("2")
+    gc.callbacks.append(profiler._on_gc)
+    try:
+        gc.collect()
+    finally:
+        gc.callbacks.remove(profiler._on_gc)
+    # The callback must not touch metrics (see MemoryProfiler.__init__)
+    assert len(profiler._gc_events) == 1
+    assert gc_pauses("2") == before
+
+    profiler.update_gauges()
+    assert not profiler._gc_events
+    assert gc_pauses("2") == before + 1
@@ -0,0 +1,35 @@
+from src.storage.memory import HyperLogLog, MemoryStore
+
+def test_hyperloglog_sparse_and_dense_agree():
+    sparse, dense = HyperLogLog(), HyperLogLog()
+    for i in range(50):
+        sparse.add(f"visitor-{i}")
+        dense.add(f"visitor-{i}")
+    dense._densify()
+    assert sparse.sparse is not None
+    assert sparse.count() == dense.count() == 50
+    assert sparse.nbytes < dense.nbytes
+
+def test_hyperloglog_densifies_and_merges():
+    big, small = HyperLogLog(), HyperLogLog()
+    for i in range(5000):
+        big.add(f"visitor-{i}")
+    for i in range(4990, 5100):
+        small.add(f"visitor-{i}")
+    assert big.sparse is None and small.sparse is not None
+    merged = HyperLogLog()
+    merged.merge(small)
+    merged.merge(big)
+    assert abs(merged.count() - 5100) <= 5100 * 0.03
+
+async def test_store_is_bounded_by_bytes():
+    store = MemoryStore(max_keys=100000, max_bytes=200 * 1024)
+    for link in range(50):
+        await store.pfadd_many([(f"hll:{link}", [f"visitor-{i}" for i in range(1000)], None)])
+    assert store.nbytes <= 200 * 1024
+    # Least recently used keys went first
+    assert await store.pfcount("hll:49") > 900
+    assert await store.pfcount("hll:0") == 0
+
+    await store.unlink_many([f"hll:{link}" for link in range(50)])
+    assert store.nbytes == 0
@@ -0,0 +1,65 @@
+import pytest
+from fastapi import HTTPException
+
+from src.services import rate_limiter
+from src.services.rate_limiter import LeasedRateLimiter
+from src.storage.memory import MemoryStore
+
+class CountingStore(MemoryStore):
+    def __init__(self):
+        super().__init__(max_keys=1000, max_bytes=1 << 20)
+        self.claims = 0
+
+    async def claim_quota(self, key, limit, amount, ttl):
+        self.claims += 1
+        return await super().claim_quota(key, limit, amount, ttl)
+
+@pytest.fixture
+def store(monkeypatch) -> CountingStore:
+    store = CountingStore()
+    monkeypatch.setattr(rate_limiter, "counter_store", store)
+    return store
+
+@pytest.fixture
+def clock(monkeypatch) -> list[float]:
+    now = [1_000_000.0]
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+    return now
+
+async def admitted(limiter: LeasedRateLimiter, limit: int = 10) -> bool:
+    try:
+        await limiter.check("tenant", limit, 60, "redirect")
+        return True
+    except HTTPException as e:
+        assert e.status_code == 429
+        return False
+
+async def test_workers_never_admit_more_than_limit(store, clock):
+    workers = [LeasedRateLimiter(precision=0.3), LeasedRateLimiter(precision=0.3)]
+    results = [await admitted(workers[i % 2]) for i in range(30)]
+    # Every leased request is eventually spent, but never more than the limit
+    assert sum(results) == 10
+
+async def test_exhausted_lease_stops_claiming(store, clock):
+    limiter = LeasedRateLimiter(precision=0.5)
+    for _ in range(10):
+        assert await admitted(limiter)
+    assert not await admitted(limiter)
+    claims = store.claims
+    for _ in range(5):
+        assert not await admitted(limiter)
+    assert store.claims == claims
+
+async def test_window_rollover_renews_budget(store, clock):
+    limiter = LeasedRateLimiter(precision=0.5)
+    for _ in range(10):
+        await admitted(limiter)
+    assert not await admitted(limiter)
+    clock[0] += 60
+    assert await admitted(limiter)
+
+async def test_release_all_returns_unspent_budget(store, clock):
+    first, second = LeasedRateLimiter(precision=0.5), LeasedRateLimiter(precision=0.5)
+    assert await admitted(first)  # leases 5, spends 1
+    await first.release_all()
+    assert sum([await admitted(second) for _ in range(10)]) == 9